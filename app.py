@@ -15,15 +15,17 @@ import streamlit as st
 # プロジェクトルートをパスに追加
 sys.path.insert(0, str(Path(__file__).parent))
 
-from config import CATEGORY_CODE_MAP, CATEGORY_LABELS
+from config import BASE_CATEGORIES, CATEGORY_CODE_MAP, CATEGORY_LABELS
 from data.storage import load_timeseries, load_etf_master, load_holdings
 from data.aggregator import (
     compute_creation_redemption,
     aggregate_by_category,
+    aggregate_by_category_all,
     aggregate_by_etf,
     aggregate_etf_breakdown,
-    get_daily_ranking,
+    get_daily_rankings,
     aggregate_nav_total,
+    aggregate_nav_total_all,
     aggregate_nav_etf_breakdown,
     compute_futures_exposure,
 )
@@ -40,6 +42,13 @@ from ui.etf_timeseries_view import render_etf_timeseries
 from ui.holdings_view import render_holdings_view
 from data.index_data import fetch_index_data
 
+# 文字列列 (etf_code, stock_name, futures_type 等) を Arrow 版の str 型で読み込む。
+# pandas 3 では既定の挙動。pandas 2.1+ でも同じ型にし、object 列を持たないようにする
+try:
+    pd.set_option("future.infer_string", True)
+except pd.errors.OptionError:
+    pass  # pandas 2.0 には無いオプション
+
 
 # ============================================================
 # ページ設定
@@ -70,12 +79,109 @@ def load_index_data(date_from, date_to):
     return fetch_index_data(date_from, date_to)
 
 
-def _render_category_section(cr_df, category, master_df, index_df=None):
-    """カテゴリ1つ分の設定・交換セクションを描画する"""
+@st.cache_data(ttl=300)
+def load_name_map() -> dict[str, str]:
+    """ETFコード → 名称 のマップ（ランキング表示用）"""
+    _, master_df, _ = load_data()
+    if master_df.empty:
+        return {}
+    return master_df.set_index("code")["name"].to_dict()
+
+
+@st.cache_data(ttl=300)
+def load_filtered_data(date_from, date_to):
+    """日付範囲で絞り込んだ時系列と設定・交換データを返す"""
+    ts_df, _, _ = load_data()
+    lo, hi = pd.Timestamp(date_from), pd.Timestamp(date_to)
+    dates = ts_df["date"]
+    if dates.is_monotonic_increasing:
+        # 日付順ソート済み: 二分探索で範囲の両端を求めてスライス
+        i0 = dates.searchsorted(lo, side="left")
+        i1 = dates.searchsorted(hi, side="right")
+        filtered_df = ts_df.iloc[i0:i1]
+    else:
+        # 比較2回 + 論理積を1式で評価（numexpr があれば numexpr エンジンで融合）
+        filtered_df = ts_df.query("@lo <= date <= @hi")
+    cr_df = compute_creation_redemption(filtered_df)
+    return filtered_df, cr_df
+
+
+# ============================================================
+# 集計結果（キャッシュ）
+#   集計関数は (日付範囲, カテゴリ) が同じなら結果も同じため、
+#   ウィジェット操作による再実行では再計算しない
+# ============================================================
+@st.cache_data(ttl=300)
+def load_category_flows(date_from, date_to, category):
+    """カテゴリ別の日次設定・交換"""
+    _, master_df, _ = load_data()
+    _, cr_df = load_filtered_data(date_from, date_to)
+    return aggregate_by_category(cr_df, category, master_df)
+
+
+@st.cache_data(ttl=300)
+def load_category_flows_all(date_from, date_to):
+    """基本カテゴリ全ての日次設定・交換"""
+    _, cr_df = load_filtered_data(date_from, date_to)
+    return aggregate_by_category_all(cr_df)
+
+
+@st.cache_data(ttl=300)
+def load_etf_breakdown(date_from, date_to, category):
+    """カテゴリ内のETF別・日別フロー"""
+    _, master_df, _ = load_data()
+    _, cr_df = load_filtered_data(date_from, date_to)
+    return aggregate_etf_breakdown(cr_df, category, master_df)
+
+
+@st.cache_data(ttl=300)
+def load_daily_rankings(date_from, date_to, category):
+    """カテゴリ内の日付別ETFランキング（日付選択時は辞書引きのみ）"""
+    _, master_df, _ = load_data()
+    _, cr_df = load_filtered_data(date_from, date_to)
+    return get_daily_rankings(cr_df, category, master_df, name_map=load_name_map())
+
+
+@st.cache_data(ttl=300)
+def load_nav_total(date_from, date_to, category):
+    """カテゴリ別のNAV合計時系列"""
+    _, master_df, _ = load_data()
+    filtered_df, _ = load_filtered_data(date_from, date_to)
+    return aggregate_nav_total(filtered_df, category, master_df)
+
+
+@st.cache_data(ttl=300)
+def load_nav_total_all(date_from, date_to):
+    """基本カテゴリ全てのNAV合計時系列"""
+    filtered_df, _ = load_filtered_data(date_from, date_to)
+    return aggregate_nav_total_all(filtered_df)
+
+
+@st.cache_data(ttl=300)
+def load_nav_etf_breakdown(date_from, date_to, category):
+    """カテゴリ内のETF別・日別NAV"""
+    _, master_df, _ = load_data()
+    filtered_df, _ = load_filtered_data(date_from, date_to)
+    return aggregate_nav_etf_breakdown(filtered_df, category, master_df)
+
+
+@st.cache_data(ttl=300)
+def load_futures_exposure(date_from, date_to):
+    """先物エクスポージャー（先物分析タブ用）"""
+    filtered_df, _ = load_filtered_data(date_from, date_to)
+    return compute_futures_exposure(filtered_df)
+
+
+def _render_category_section(category, date_from, date_to, index_df=None, daily=None):
+    """
+    カテゴリ1つ分の設定・交換セクションを描画する。
+    daily が渡された場合は集計済みの日次データとして使用する。
+    """
     label = CATEGORY_LABELS.get(category, category)
     st.header(f"{label} の設定・交換")
 
-    daily = aggregate_by_category(cr_df, category, master_df)
+    if daily is None:
+        daily = load_category_flows(date_from, date_to, category)
     if daily.empty:
         st.info(f"{label} のデータがありません")
         return
@@ -93,7 +199,7 @@ def _render_category_section(cr_df, category, master_df, index_df=None):
             idx = index_df[cols].dropna()
 
     # ETF別内訳付き棒グラフ + 指数二軸
-    breakdown = aggregate_etf_breakdown(cr_df, category, master_df)
+    breakdown = load_etf_breakdown(date_from, date_to, category)
     render_creation_redemption_chart(
         daily, f"{label} 設定・交換", etf_breakdown=breakdown, index_df=idx
     )
@@ -107,7 +213,8 @@ def _render_category_section(cr_df, category, master_df, index_df=None):
         key=f"date_select_{category}",
     )
     if selected_date:
-        ranking = get_daily_ranking(cr_df, selected_date, category, master_df)
+        rankings = load_daily_rankings(date_from, date_to, category)
+        ranking = rankings.get(pd.Timestamp(selected_date), pd.DataFrame())
         st.subheader(f"{selected_date} の設定・交換ランキング")
         render_daily_ranking(ranking, selected_date)
 
@@ -133,11 +240,8 @@ def main():
     date_to = filters["date_to"]
     selected_etf = filters["selected_etf"]
 
-    # 日付フィルタ適用
-    filtered_df = ts_df[
-        (ts_df["date"] >= pd.Timestamp(date_from))
-        & (ts_df["date"] <= pd.Timestamp(date_to))
-    ].copy()
+    # 日付フィルタ適用 + 設定・交換計算（日付範囲ごとにキャッシュ）
+    filtered_df, cr_df = load_filtered_data(date_from, date_to)
 
     # 指数データ取得（設定・交換 + 資産残高で共用）
     index_df = load_index_data(date_from, date_to)
@@ -152,8 +256,6 @@ def main():
     # タブ1: 設定・交換
     # ========================================
     with tab_cr:
-        cr_df = compute_creation_redemption(filtered_df)
-
         if selected_etf:
             st.header(f"ETF {selected_etf} の設定・交換")
             etf_cr = aggregate_by_etf(cr_df, selected_etf)
@@ -163,14 +265,15 @@ def main():
                 st.info(f"{selected_etf} の設定・交換データがありません")
         else:
             if category == "all":
-                for cat_key in [
-                    "topix", "topix_lev", "topix_inv",
-                    "nikkei225", "nikkei225_lev", "nikkei225_inv",
-                ]:
-                    _render_category_section(cr_df, cat_key, master_df, index_df)
+                daily_by_cat = load_category_flows_all(date_from, date_to)
+                for cat_key in BASE_CATEGORIES:
+                    _render_category_section(
+                        cat_key, date_from, date_to, index_df,
+                        daily=daily_by_cat.get(cat_key, pd.DataFrame()),
+                    )
                     st.markdown("---")
             else:
-                _render_category_section(cr_df, category, master_df, index_df)
+                _render_category_section(category, date_from, date_to, index_df)
 
     # ========================================
     # タブ2: 資産残高
@@ -189,16 +292,12 @@ def main():
             return index_df[cols].dropna() if cols else None
 
         if category == "all":
-            for cat_key in [
-                "topix", "topix_lev", "topix_inv",
-                "nikkei225", "nikkei225_lev", "nikkei225_inv",
-            ]:
+            nav_by_cat = load_nav_total_all(date_from, date_to)
+            for cat_key in BASE_CATEGORIES:
                 cat_label = CATEGORY_LABELS.get(cat_key, cat_key)
-                nav_data = aggregate_nav_total(filtered_df, cat_key, master_df)
-                if not nav_data.empty:
-                    breakdown = aggregate_nav_etf_breakdown(
-                        filtered_df, cat_key, master_df
-                    )
+                nav_data = nav_by_cat.get(cat_key)
+                if nav_data is not None:
+                    breakdown = load_nav_etf_breakdown(date_from, date_to, cat_key)
                     idx = _get_index_for_category(cat_key, index_df)
                     render_nav_timeseries(
                         nav_data, f"{cat_label} 資産残高",
@@ -207,11 +306,9 @@ def main():
                     st.markdown("---")
         else:
             label = CATEGORY_LABELS.get(category, category)
-            nav_data = aggregate_nav_total(filtered_df, category, master_df)
+            nav_data = load_nav_total(date_from, date_to, category)
             if not nav_data.empty:
-                breakdown = aggregate_nav_etf_breakdown(
-                    filtered_df, category, master_df
-                )
+                breakdown = load_nav_etf_breakdown(date_from, date_to, category)
                 idx = _get_index_for_category(category, index_df)
                 render_nav_timeseries(
                     nav_data, f"{label} 資産残高",
@@ -225,7 +322,7 @@ def main():
     # ========================================
     with tab_futures:
         st.header("先物ポジション分析")
-        futures_df = compute_futures_exposure(filtered_df)
+        futures_df = load_futures_exposure(date_from, date_to)
         render_futures_analysis(futures_df, index_df=index_df)
 
     # ========================================
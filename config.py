@@ -155,6 +155,12 @@ CATEGORY_CODE_MAP: dict[str, list[str]] = {
     "nikkei225_all": NIKKEI225_ETF_CODES,
 }
 
+# 「全ETF」表示で並べる基本カテゴリ（互いに重複しない）
+BASE_CATEGORIES: list[str] = [
+    "topix", "topix_lev", "topix_inv",
+    "nikkei225", "nikkei225_lev", "nikkei225_inv",
+]
+
 # カテゴリの表示名
 CATEGORY_LABELS: dict[str, str] = {
     "topix": "TOPIX型（本体）",
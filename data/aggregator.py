@@ -8,15 +8,75 @@ from __future__ import annotations
 import logging
 from typing import Optional
 
+import numpy as np
 import pandas as pd
 
 from config import (
     TOPIX_ETF_CODES, NIKKEI225_ETF_CODES, FUTURES_MULTIPLIERS,
-    CATEGORY_CODE_MAP,
+    CATEGORY_CODE_MAP, BASE_CATEGORIES,
 )
 
 logger = logging.getLogger(__name__)
 
+# ETFコード → 基本カテゴリ（「全ETF」表示の一括集計用）
+_CODE_TO_CATEGORY: dict[str, str] = {
+    code: cat for cat in BASE_CATEGORIES for code in CATEGORY_CODE_MAP[cat]
+}
+
+# カテゴリ → ETFコード集合（呼び出しごとのリスト生成を避けるため事前に作成）
+_CATEGORY_CODE_SETS: dict[str, frozenset[str]] = {
+    cat: frozenset(codes) for cat, codes in CATEGORY_CODE_MAP.items()
+}
+
+
+def _cr_kernel(
+    group_start: np.ndarray,
+    shares: np.ndarray,
+    nav_per_unit: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (etf_code, date) でソート済みの配列から設定・交換の数値列を計算する。
+
+    Args:
+        group_start: 各ETFの先頭行で True となるマスク
+        shares: 発行済口数
+        nav_per_unit: 1口あたりNAV（当日）
+
+    Returns:
+        (口数増減, 前日1口あたりNAV, 設定・交換金額)
+    """
+    shares_change = np.full(len(shares), np.nan)
+    shares_change[1:] = shares[1:] - shares[:-1]
+    shares_change[group_start] = np.nan
+
+    # 前日(t-1)の1口あたりNAV: 設定・交換は前日NAVで約定
+    nav_per_unit_prev = np.full(len(nav_per_unit), np.nan)
+    nav_per_unit_prev[1:] = nav_per_unit[:-1]
+    nav_per_unit_prev[group_start] = np.nan
+
+    # 設定・交換金額 = 口数増減(t) × 1口あたりNAV(t-1)
+    flow_amount = shares_change * nav_per_unit_prev
+    return shares_change, nav_per_unit_prev, flow_amount
+
+
+def _sort_by_code_date(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    (etf_code, date) 順に並べ替えたコピーを返す。
+
+    既に並んでいれば並べ替えを省き、日付順に並んでいる場合（load_timeseries の出力）は
+    etf_code だけの安定ソートで (etf_code, date) 順にする。
+    """
+    codes = df["etf_code"]
+    dates = df["date"]
+    if codes.is_monotonic_increasing:
+        same = (codes.to_numpy()[1:] == codes.to_numpy()[:-1])
+        d = dates.to_numpy()
+        if (d[1:][same] >= d[:-1][same]).all():
+            return df.copy()
+    if dates.is_monotonic_increasing:
+        return df.sort_values("etf_code", kind="stable")
+    return df.sort_values(["etf_code", "date"])
+
 
 def compute_creation_redemption(df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -44,26 +104,35 @@ def compute_creation_redemption(df: pd.DataFrame) -> pd.DataFrame:
         if col not in df.columns:
             raise ValueError(f"必須列がありません: {col}")
 
-    # 日付でソート
-    df = df.sort_values(["etf_code", "date"]).copy()
-
-    # 口数の日次差分
-    df["shares_change"] = df.groupby("etf_code")["shares_outstanding"].diff()
+    # (etf_code, date) 順に並べる（必要な列だけ取り出してから並べ替え）
+    df = _sort_by_code_date(df[required_cols])
 
-    # 1口あたりNAV（当日）
-    df["nav_per_unit"] = df["nav"] / df["shares_outstanding"]
-    df["nav_per_unit"] = df["nav_per_unit"].replace([float("inf"), float("-inf")], None)
-
-    # 前日(t-1)の1口あたりNAV: 設定・交換は前日NAVで約定
-    df["nav_per_unit_prev"] = df.groupby("etf_code")["nav_per_unit"].shift(1)
-
-    # 設定・交換金額 = 口数増減(t) × 1口あたりNAV(t-1)
-    df["flow_amount"] = df["shares_change"] * df["nav_per_unit_prev"]
-
-    # フロータイプ
-    df["flow_type"] = df["shares_change"].apply(
-        lambda x: "creation" if pd.notna(x) and x > 0
-        else ("redemption" if pd.notna(x) and x < 0 else None)
+    # 1口あたりNAV（当日）: 口数ゼロ割りによる ±inf は欠損扱い
+    with np.errstate(divide="ignore", invalid="ignore"):
+        nav_per_unit = (
+            pd.to_numeric(df["nav"]).to_numpy(dtype=float, na_value=np.nan)
+            / pd.to_numeric(df["shares_outstanding"]).to_numpy(dtype=float, na_value=np.nan)
+        )
+    nav_per_unit[np.isinf(nav_per_unit)] = np.nan
+    df["nav_per_unit"] = nav_per_unit
+
+    # 口数の日次差分・前日NAV・設定交換金額をソート済み配列上で一括計算
+    codes = df["etf_code"].to_numpy()
+    group_start = np.ones(len(df), dtype=bool)
+    group_start[1:] = codes[1:] != codes[:-1]
+    shares_change, nav_per_unit_prev, flow_amount = _cr_kernel(
+        group_start,
+        pd.to_numeric(df["shares_outstanding"]).to_numpy(dtype=float, na_value=np.nan),
+        nav_per_unit,
+    )
+    df["shares_change"] = shares_change
+    df["nav_per_unit_prev"] = nav_per_unit_prev
+    df["flow_amount"] = flow_amount
+
+    # フロータイプ (0=creation, 1=redemption, -1=変化なし/欠損)
+    flow_codes = np.select([shares_change > 0, shares_change < 0], [0, 1], default=-1)
+    df["flow_type"] = pd.Categorical.from_codes(
+        flow_codes, categories=["creation", "redemption"],
     )
 
     # 最初の日（差分が計算できない）を除外
@@ -80,15 +149,15 @@ def _resolve_codes(
     category: str,
     cr_df: pd.DataFrame,
     master_df: Optional[pd.DataFrame] = None,
-) -> list[str]:
-    """カテゴリからETFコードリストを解決する"""
-    if category in CATEGORY_CODE_MAP:
-        return CATEGORY_CODE_MAP[category]
+) -> frozenset[str]:
+    """カテゴリからETFコード集合を解決する"""
+    if category in _CATEGORY_CODE_SETS:
+        return _CATEGORY_CODE_SETS[category]
     elif category == "all":
-        return cr_df["etf_code"].unique().tolist()
+        return frozenset(cr_df["etf_code"].unique())
     elif master_df is not None and not master_df.empty:
-        return master_df[master_df["category"] == category]["code"].tolist()
-    return cr_df["etf_code"].unique().tolist()
+        return frozenset(master_df.loc[master_df["category"] == category, "code"])
+    return frozenset(cr_df["etf_code"].unique())
 
 
 def aggregate_by_category(
@@ -107,22 +176,74 @@ def aggregate_by_category(
         return pd.DataFrame()
 
     codes = _resolve_codes(category, cr_df, master_df)
-    filtered = cr_df[cr_df["etf_code"].isin(codes)].copy()
+    filtered = cr_df[cr_df["etf_code"].isin(codes)]
 
     if filtered.empty:
         return pd.DataFrame()
 
-    daily = filtered.groupby("date").agg(
-        total_creation=("flow_amount", lambda x: x[x > 0].sum()),
-        total_redemption=("flow_amount", lambda x: x[x < 0].sum()),
-        creation_count=("flow_type", lambda x: (x == "creation").sum()),
-        redemption_count=("flow_type", lambda x: (x == "redemption").sum()),
+    daily = _daily_flow_agg(filtered, ["date"])
+    daily["cumulative_flow"] = _cumsum(daily["net_flow"])
+    daily = daily.sort_values("date").reset_index(drop=True)
+
+    return daily
+
+
+def aggregate_by_category_all(cr_df: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    """
+    基本カテゴリ (BASE_CATEGORIES) 全ての日次設定・交換を一括集計する。
+
+    (category, date) の1回の groupby で集計し、カテゴリごとに分割して返す。
+    各 DataFrame の列は aggregate_by_category と同じ。
+
+    Returns:
+        {カテゴリ: 日次集計 DataFrame}（データのないカテゴリは含まない）
+    """
+    if cr_df.empty:
+        return {}
+
+    with_cat = _with_category(cr_df)
+    daily = _daily_flow_agg(with_cat, ["category", "date"])
+
+    result = {}
+    for cat, group in daily.groupby("category", observed=True, sort=False):
+        group = group.drop(columns="category").sort_values("date")
+        group["cumulative_flow"] = _cumsum(group["net_flow"])
+        result[cat] = group.reset_index(drop=True)
+    return result
+
+
+def _cumsum(values: pd.Series) -> np.ndarray:
+    """累積和を numpy で計算する（欠損は Series.cumsum と同様にスキップ）"""
+    arr = values.to_numpy(dtype=float, na_value=np.nan)
+    result = np.nancumsum(arr)
+    result[np.isnan(arr)] = np.nan
+    return result
+
+
+def _with_category(df: pd.DataFrame) -> pd.DataFrame:
+    """基本カテゴリ列を付与し、どのカテゴリにも属さない行を除外する"""
+    category = df["etf_code"].map(_CODE_TO_CATEGORY)
+    return df.assign(category=category)[category.notna()]
+
+
+def _daily_flow_agg(filtered: pd.DataFrame, keys: list[str]) -> pd.DataFrame:
+    """設定・交換の合計・件数を keys 単位で集計する"""
+    # 符号・種別ごとのマスク列を先に作り、groupby は組み込み sum のみで集計
+    flow = filtered["flow_amount"]
+    filtered = filtered.assign(
+        _creation=flow.where(flow > 0, 0.0),
+        _redemption=flow.where(flow < 0, 0.0),
+        _creation_n=(filtered["flow_type"] == "creation").astype(np.int64),
+        _redemption_n=(filtered["flow_type"] == "redemption").astype(np.int64),
+    )
+    daily = filtered.groupby(keys, observed=True).agg(
+        total_creation=("_creation", "sum"),
+        total_redemption=("_redemption", "sum"),
+        creation_count=("_creation_n", "sum"),
+        redemption_count=("_redemption_n", "sum"),
     ).reset_index()
 
     daily["net_flow"] = daily["total_creation"] + daily["total_redemption"]
-    daily["cumulative_flow"] = daily["net_flow"].cumsum()
-    daily = daily.sort_values("date").reset_index(drop=True)
-
     return daily
 
 
@@ -141,15 +262,15 @@ def aggregate_etf_breakdown(
         return pd.DataFrame()
 
     codes = _resolve_codes(category, cr_df, master_df)
-    filtered = cr_df[cr_df["etf_code"].isin(codes)].copy()
+    filtered = cr_df[cr_df["etf_code"].isin(codes)]
 
     if filtered.empty:
         return pd.DataFrame()
 
-    # ラベルはコードのみ
-    filtered["etf_label"] = filtered["etf_code"]
-
-    return filtered[["etf_code", "date", "flow_amount", "etf_label"]].copy()
+    # ラベルはコードのみ（列選択で作られる新しいフレームに1回だけ付与）
+    return filtered[["etf_code", "date", "flow_amount"]].assign(
+        etf_label=filtered["etf_code"],
+    )
 
 
 def get_daily_ranking(
@@ -157,9 +278,12 @@ def get_daily_ranking(
     target_date,
     category: str = "topix",
     master_df: Optional[pd.DataFrame] = None,
+    name_map: Optional[dict[str, str]] = None,
 ) -> pd.DataFrame:
     """
     指定日のETF別設定・交換ランキングを返す。
+
+    name_map (ETFコード → 名称) が渡された場合は master_df から作らずに使う。
     """
     if cr_df.empty:
         return pd.DataFrame()
@@ -168,23 +292,66 @@ def get_daily_ranking(
     day_df = cr_df[
         (cr_df["etf_code"].isin(codes))
         & (cr_df["date"] == pd.Timestamp(target_date))
-    ].copy()
+    ]
 
     if day_df.empty:
         return pd.DataFrame()
 
-    if master_df is not None and not master_df.empty:
+    if name_map is None and master_df is not None and not master_df.empty:
         name_map = master_df.set_index("code")["name"].to_dict()
-        day_df["etf_label"] = day_df["etf_code"].map(
-            lambda c: name_map.get(c, c)
-        )
+
+    if name_map:
+        codes = day_df["etf_code"].astype(str)
+        etf_label = codes.map(name_map).fillna(codes)
     else:
-        day_df["etf_label"] = day_df["etf_code"]
+        etf_label = day_df["etf_code"]
 
-    result = day_df[["etf_code", "etf_label", "flow_amount"]].copy()
+    result = day_df[["etf_code", "flow_amount"]].assign(etf_label=etf_label)
+    result = result[["etf_code", "etf_label", "flow_amount"]]
     return result.sort_values("flow_amount", ascending=False).reset_index(drop=True)
 
 
+def get_daily_rankings(
+    cr_df: pd.DataFrame,
+    category: str = "topix",
+    master_df: Optional[pd.DataFrame] = None,
+    name_map: Optional[dict[str, str]] = None,
+) -> dict[pd.Timestamp, pd.DataFrame]:
+    """
+    全日付のETF別設定・交換ランキングを一括で作成する。
+
+    Returns:
+        {日付: get_daily_ranking と同じ列の DataFrame}
+    """
+    if cr_df.empty:
+        return {}
+
+    codes = _resolve_codes(category, cr_df, master_df)
+    filtered = cr_df[cr_df["etf_code"].isin(codes)]
+    if filtered.empty:
+        return {}
+
+    if name_map is None and master_df is not None and not master_df.empty:
+        name_map = master_df.set_index("code")["name"].to_dict()
+
+    if name_map:
+        codes = filtered["etf_code"].astype(str)
+        etf_label = codes.map(name_map).fillna(codes)
+    else:
+        etf_label = filtered["etf_code"]
+
+    # 日付・フロー降順に1回だけソートし、日付ごとに切り出す
+    ranked = filtered[["date", "etf_code", "flow_amount"]].assign(etf_label=etf_label)
+    ranked = ranked.sort_values(
+        ["date", "flow_amount"], ascending=[True, False], kind="stable",
+    )
+    cols = ["etf_code", "etf_label", "flow_amount"]
+    return {
+        day: group[cols].reset_index(drop=True)
+        for day, group in ranked.groupby("date", sort=False)
+    }
+
+
 def aggregate_nav_total(
     df: pd.DataFrame,
     category: str = "topix",
@@ -197,20 +364,42 @@ def aggregate_nav_total(
         return pd.DataFrame()
 
     codes = _resolve_codes(category, df, master_df)
-    filtered = df[df["etf_code"].isin(codes)].copy()
+    filtered = df[df["etf_code"].isin(codes)]
 
     if filtered.empty:
         return pd.DataFrame()
 
-    daily = filtered.groupby("date").agg(
+    daily = _daily_nav_agg(filtered, ["date"])
+    return daily.sort_values("date").reset_index(drop=True)
+
+
+def aggregate_nav_total_all(df: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    """
+    基本カテゴリ (BASE_CATEGORIES) 全てのNAV合計時系列を一括集計する。
+
+    Returns:
+        {カテゴリ: aggregate_nav_total と同じ列の DataFrame}
+    """
+    if df.empty:
+        return {}
+
+    daily = _daily_nav_agg(_with_category(df), ["category", "date"])
+
+    return {
+        cat: group.drop(columns="category").sort_values("date").reset_index(drop=True)
+        for cat, group in daily.groupby("category", observed=True, sort=False)
+    }
+
+
+def _daily_nav_agg(filtered: pd.DataFrame, keys: list[str]) -> pd.DataFrame:
+    """NAVの合計・平均・最大・ETF数を keys 単位で集計する"""
+    return filtered.groupby(keys, observed=True).agg(
         nav_total=("nav", "sum"),
         nav_mean=("nav", "mean"),
         nav_max=("nav", "max"),
         etf_count=("etf_code", "nunique"),
     ).reset_index()
 
-    return daily.sort_values("date").reset_index(drop=True)
-
 
 def aggregate_nav_etf_breakdown(
     df: pd.DataFrame,
@@ -228,12 +417,12 @@ def aggregate_nav_etf_breakdown(
         return pd.DataFrame()
 
     codes = _resolve_codes(category, df, master_df)
-    filtered = df[df["etf_code"].isin(codes)].copy()
+    filtered = df[df["etf_code"].isin(codes)]
 
     if filtered.empty:
         return pd.DataFrame()
 
-    return filtered[["etf_code", "date", "nav"]].copy()
+    return filtered[["etf_code", "date", "nav"]]
 
 
 def aggregate_by_etf(
@@ -253,7 +442,7 @@ def aggregate_by_etf(
     if filtered.empty:
         return pd.DataFrame()
 
-    filtered["cumulative_flow"] = filtered["flow_amount"].cumsum()
+    filtered["cumulative_flow"] = _cumsum(filtered["flow_amount"])
     return filtered.sort_values("date").reset_index(drop=True)
 
 
@@ -269,43 +458,50 @@ def compute_futures_exposure(df: pd.DataFrame) -> pd.DataFrame:
     if df.empty:
         return pd.DataFrame()
 
-    has_mvtype = "market_value_type" in df.columns
-
-    result_rows = []
-    for _, row in df.iterrows():
-        base = {
-            "etf_code": row["etf_code"],
-            "date": row["date"],
-            "nav": row.get("nav"),
-            "market_value_type": row.get("market_value_type") if has_mvtype else None,
-        }
-
-        # 先物1
-        if pd.notna(row.get("futures1_type")):
-            result_rows.append({
-                **base,
-                "futures_type": row["futures1_type"],
-                "contract_month": row.get("futures1_contract_month"),
-                "quantity": row.get("futures1_quantity"),
-                "market_value": row.get("futures1_market_value"),
-                "multiplier": row.get("futures1_multiplier"),
-            })
-
-        # 先物2
-        if pd.notna(row.get("futures2_type")):
-            result_rows.append({
-                **base,
-                "futures_type": row["futures2_type"],
-                "contract_month": row.get("futures2_contract_month"),
-                "quantity": row.get("futures2_quantity"),
-                "market_value": row.get("futures2_market_value"),
-                "multiplier": row.get("futures2_multiplier"),
-            })
-
-    if not result_rows:
+    base_cols = ["etf_code", "date", "nav", "market_value_type"]
+    fields = {
+        "futures_type": "type",
+        "contract_month": "contract_month",
+        "quantity": "quantity",
+        "market_value": "market_value",
+        "multiplier": "multiplier",
+    }
+
+    numeric_fields = {"quantity", "market_value", "multiplier"}
+
+    # 先物1・先物2 を列ごとに numpy 配列として交互に並べる
+    # (行ごとに 先物1 → 先物2 の順、長さ 2 × len(df))
+    def _interleave(suffix: str) -> np.ndarray:
+        numeric = suffix in numeric_fields
+        slots = []
+        for n in (1, 2):
+            col = f"futures{n}_{suffix}"
+            if col not in df.columns:
+                slots.append(np.full(len(df), np.nan if numeric else None))
+            elif numeric:
+                slots.append(
+                    pd.to_numeric(df[col]).to_numpy(dtype=float, na_value=np.nan)
+                )
+            else:
+                slots.append(df[col].to_numpy(dtype=object))
+        return np.column_stack(slots).ravel()
+
+    futures_arrays = {name: _interleave(suffix) for name, suffix in fields.items()}
+    mask = pd.notna(futures_arrays["futures_type"])
+    if not mask.any():
         return pd.DataFrame()
 
-    futures_df = pd.DataFrame(result_rows)
+    # 基本列は元の行位置を参照して取り出す（dtype を維持）
+    rows = np.repeat(np.arange(len(df)), 2)[mask]
+    data = {}
+    for col in base_cols:
+        if col in df.columns:
+            data[col] = df[col].take(rows).reset_index(drop=True)
+        else:
+            data[col] = np.full(len(rows), None, dtype=object)
+    for name, arr in futures_arrays.items():
+        data[name] = arr[mask]
+    futures_df = pd.DataFrame(data)
 
     # 想定元本 (notional_value) を計算
     #
@@ -317,28 +513,24 @@ def compute_futures_exposure(df: pd.DataFrame) -> pd.DataFrame:
     #   - 想定元本の場合: mv / (qty × mult) = 先物価格 (TOPIX~3800, NK225~57000)
     #   - 掛け目なしの場合: mv / (qty × mult) = 先物価格 / mult (~0.4 for TOPIX)
     #   閾値: mv / (qty × mult) >= 100 → 想定元本、< 100 → 掛け目なし
-    def _calc_notional(row):
-        mv = row.get("market_value")
-        qty = row.get("quantity")
-        mult = row.get("multiplier")
-        if pd.isna(mv) or not mv:
-            return None
-        if pd.isna(qty) or not qty or pd.isna(mult) or not mult:
-            return mv
-        # mv / (qty × mult) で先物単価を推定
-        unit_price_estimate = abs(mv) / (abs(qty) * mult)
-        if unit_price_estimate >= 100:
-            # 既に想定元本（Excel / Amova形式）
-            return mv
-        else:
-            # qty × price 形式 → multiplier を掛けて想定元本にする
-            return mv * mult
-
-    futures_df["notional_value"] = futures_df.apply(_calc_notional, axis=1)
+    mv = futures_df["market_value"].to_numpy()
+    qty = futures_df["quantity"].to_numpy()
+    mult = futures_df["multiplier"].to_numpy()
+
+    has_mv = ~np.isnan(mv) & (mv != 0)
+    has_unit = ~np.isnan(qty) & (qty != 0) & ~np.isnan(mult) & (mult != 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        unit_price_estimate = np.abs(mv) / (np.abs(qty) * mult)
+    notional = np.where(
+        has_unit & (unit_price_estimate < 100), mv * mult, mv,
+    )
+    futures_df["notional_value"] = np.where(has_mv, notional, np.nan)
 
     # 先物比率 (NAVに対する先物エクスポージャー)
-    futures_df["futures_ratio"] = (
-        futures_df["notional_value"].abs() / futures_df["nav"]
-    ).where(futures_df["nav"] > 0)
+    nav = pd.to_numeric(futures_df["nav"], errors="coerce").to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        futures_df["futures_ratio"] = np.where(
+            nav > 0, np.abs(futures_df["notional_value"].to_numpy()) / nav, np.nan,
+        )
 
     return futures_df
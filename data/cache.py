@@ -2,17 +2,28 @@
 PCF CSVのローカルキャッシュ管理
 
 ダウンロード済みCSVをローカルに保存し、再ダウンロードを防ぐ。
+銘柄単位のダウンロードは CSV ファイル、一括ZIPのダウンロードは
+(プロバイダ, 日付) ごとに1つの Arrow IPC ファイルとして保存する。
 """
 from __future__ import annotations
 
+import json
 import logging
+import time
 from datetime import date
 from pathlib import Path
 
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.ipc as ipc
+
 from config import CACHE_DIR
 
 logger = logging.getLogger(__name__)
 
+# parse_pcf の結果キャッシュ (data/parse_cache.py) の保存先
+PARSE_CACHE_DIR = CACHE_DIR / "parsed"
+
 
 def _get_cache_path(provider: str, etf_code: str, target_date: date) -> Path:
     """キャッシュファイルのパスを生成"""
@@ -20,10 +31,37 @@ def _get_cache_path(provider: str, etf_code: str, target_date: date) -> Path:
     return CACHE_DIR / provider / f"{etf_code}_{date_str}.csv"
 
 
+def _get_bulk_cache_path(provider: str, target_date: date) -> Path:
+    """一括キャッシュ (Arrow IPC) ファイルのパスを生成"""
+    date_str = target_date.strftime("%Y%m%d")
+    return CACHE_DIR / provider / f"bulk_{date_str}.arrow"
+
+
+def _read_bulk_table(path: Path) -> pa.Table:
+    """一括キャッシュをメモリマップで開き、コピーせずにテーブルとして読む"""
+    with pa.memory_map(str(path), "r") as source:
+        return ipc.open_file(source).read_all()
+
+
+def _write_text_atomic(path: Path, text: str) -> None:
+    """
+    テキストファイルを一時ファイル経由で書き出す。
+
+    並列ダウンロード中や中断時に、書きかけのファイルをキャッシュとして
+    読まないようにする。
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(text, encoding="utf-8")
+    tmp_path.replace(path)
+
+
 def get_cached_csv(provider: str, etf_code: str, target_date: date) -> str | None:
     """
     キャッシュからCSVテキストを取得する。
 
+    銘柄単位の CSV キャッシュが無ければ、同じ日付の一括キャッシュから探す。
+
     Returns:
         CSVテキスト。キャッシュがなければ None。
     """
@@ -37,6 +75,18 @@ def get_cached_csv(provider: str, etf_code: str, target_date: date) -> str | Non
             return None
         logger.debug(f"キャッシュヒット: {path}")
         return text
+
+    bulk_path = _get_bulk_cache_path(provider, target_date)
+    if bulk_path.exists():
+        try:
+            table = _read_bulk_table(bulk_path)
+        except (OSError, pa.ArrowInvalid) as e:
+            logger.warning(f"一括キャッシュ読み込み失敗: {bulk_path}: {e}")
+            return None
+        matched = table.filter(pc.equal(table["etf_code"], etf_code))
+        if matched.num_rows:
+            logger.debug(f"一括キャッシュヒット: {bulk_path} ({etf_code})")
+            return matched["csv_text"][0].as_py()
     return None
 
 
@@ -50,8 +100,131 @@ def save_to_cache(
         保存先パス
     """
     path = _get_cache_path(provider, etf_code, target_date)
+    _write_text_atomic(path, csv_text)
+    logger.debug(f"キャッシュ保存: {path}")
+    return path
+
+
+def get_cached_bulk(provider: str, target_date: date) -> dict[str, str] | None:
+    """
+    一括キャッシュから全銘柄のCSVテキストを取得する。
+
+    Returns:
+        {ETFコード: CSVテキスト} の辞書。キャッシュがなければ None。
+    """
+    path = _get_bulk_cache_path(provider, target_date)
+    if not path.exists():
+        return None
+    try:
+        table = _read_bulk_table(path)
+    except (OSError, pa.ArrowInvalid) as e:
+        logger.warning(f"一括キャッシュ読み込み失敗: {path}: {e}")
+        return None
+    logger.debug(f"一括キャッシュヒット: {path}")
+    return dict(zip(
+        table["etf_code"].to_pylist(), table["csv_text"].to_pylist()
+    ))
+
+
+def save_bulk_to_cache(
+    provider: str, target_date: date, csv_texts: dict[str, str]
+) -> Path:
+    """
+    一括ZIPから取り出した全銘柄のCSVテキストを1ファイルに保存する。
+
+    銘柄ごとに CSV ファイルを書く代わりに、(ETFコード, CSVテキスト) の
+    テーブルを Arrow IPC 形式で1回だけ書き出す。
+
+    Returns:
+        保存先パス
+    """
+    path = _get_bulk_cache_path(provider, target_date)
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(csv_text, encoding="utf-8")
+    table = pa.table({
+        "etf_code": pa.array(list(csv_texts.keys()), type=pa.string()),
+        "csv_text": pa.array(list(csv_texts.values()), type=pa.large_string()),
+    })
+    # 書き込み途中のファイルを読まないよう、一時ファイルに書いてから置き換える
+    tmp_path = path.with_suffix(".arrow.tmp")
+    with ipc.new_file(str(tmp_path), table.schema) as writer:
+        writer.write_table(table)
+    tmp_path.replace(path)
+    logger.debug(f"一括キャッシュ保存: {path} ({len(csv_texts)} 銘柄)")
+    return path
+
+
+def _get_validators_path(provider: str, etf_code: str) -> Path:
+    """条件付きGET用の検証子ファイルのパスを生成"""
+    return CACHE_DIR / provider / f"{etf_code}.validators.json"
+
+
+def get_cache_validators(provider: str, etf_code: str) -> dict:
+    """
+    直近にダウンロードしたCSVの検証子 (ETag / Last-Modified) を取得する。
+
+    Returns:
+        {"etag", "last_modified", "date"} の辞書。date は検証子に対応する
+        キャッシュCSVの日付 (YYYYMMDD)。記録がなければ空の辞書。
+    """
+    path = _get_validators_path(provider, etf_code)
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        logger.debug(f"検証子の読み込み失敗: {path}: {e}")
+        return {}
+
+
+def save_cache_validators(
+    provider: str, etf_code: str, target_date: date, validators: dict
+) -> None:
+    """
+    ダウンロードしたCSVの検証子を保存する。
+
+    ETag / Last-Modified のどちらも無い場合は何もしない。
+    """
+    etag = validators.get("etag")
+    last_modified = validators.get("last_modified")
+    if not etag and not last_modified:
+        return
+    path = _get_validators_path(provider, etf_code)
+    _write_text_atomic(path, json.dumps({
+        "etag": etag,
+        "last_modified": last_modified,
+        "date": target_date.strftime("%Y%m%d"),
+    }))
+
+
+def _get_etf_codes_path(target_date: date) -> Path:
+    """JPXから取得したETFコード一覧のキャッシュパスを生成"""
+    date_str = target_date.strftime("%Y%m%d")
+    return CACHE_DIR / "jpx" / f"etf_codes_{date_str}.json"
+
+
+def get_cached_etf_codes(target_date: date) -> list[str] | None:
+    """
+    指定日に取得済みのETFコード一覧をキャッシュから取得する。
+
+    Returns:
+        ETFコードのリスト。キャッシュがなければ None。
+    """
+    path = _get_etf_codes_path(target_date)
+    if not path.exists():
+        return None
+    try:
+        codes = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        logger.debug(f"ETFコード一覧キャッシュの読み込み失敗: {path}: {e}")
+        return None
+    logger.debug(f"キャッシュヒット: {path}")
+    return codes
+
+
+def save_etf_codes(target_date: date, codes: list[str]) -> Path:
+    """JPXから取得したETFコード一覧をキャッシュに保存する"""
+    path = _get_etf_codes_path(target_date)
+    _write_text_atomic(path, json.dumps(codes))
     logger.debug(f"キャッシュ保存: {path}")
     return path
 
@@ -62,36 +235,62 @@ def list_cached_dates(provider: str, etf_code: str) -> list[date]:
     if not provider_dir.exists():
         return []
 
-    dates = []
+    dates = set()
     for f in provider_dir.glob(f"{etf_code}_*.csv"):
         try:
             date_str = f.stem.split("_")[-1]
             d = date(int(date_str[:4]), int(date_str[4:6]), int(date_str[6:8]))
-            dates.append(d)
+            dates.add(d)
         except (ValueError, IndexError):
             pass
 
+    # 一括キャッシュに含まれる日付
+    for f in provider_dir.glob("bulk_*.arrow"):
+        try:
+            date_str = f.stem.split("_")[-1]
+            d = date(int(date_str[:4]), int(date_str[4:6]), int(date_str[6:8]))
+            codes = _read_bulk_table(f).column("etf_code")
+            if pc.any(pc.equal(codes, etf_code)).as_py():
+                dates.add(d)
+        except (ValueError, IndexError, OSError, pa.ArrowInvalid):
+            pass
+
     return sorted(dates)
 
 
 def clear_old_cache(provider: str, keep_days: int = 30) -> int:
-    """古いキャッシュファイルを削除する"""
+    """
+    古いキャッシュファイルを削除する。
+
+    CSV・一括キャッシュはファイル名の日付、パース結果キャッシュは
+    更新日時で判定する。
+    """
     from datetime import timedelta
     cutoff = date.today() - timedelta(days=keep_days)
-    provider_dir = CACHE_DIR / provider
-    if not provider_dir.exists():
-        return 0
 
     removed = 0
-    for f in provider_dir.glob("*.csv"):
-        try:
-            date_str = f.stem.split("_")[-1]
-            d = date(int(date_str[:4]), int(date_str[4:6]), int(date_str[6:8]))
-            if d < cutoff:
-                f.unlink()
-                removed += 1
-        except (ValueError, IndexError):
-            pass
+    parsed_dir = PARSE_CACHE_DIR / provider
+    if parsed_dir.exists():
+        cutoff_ts = time.time() - keep_days * 86400
+        for f in parsed_dir.glob("*.pkl"):
+            try:
+                if f.stat().st_mtime < cutoff_ts:
+                    f.unlink()
+                    removed += 1
+            except OSError:
+                pass
+
+    provider_dir = CACHE_DIR / provider
+    if provider_dir.exists():
+        for f in [*provider_dir.glob("*.csv"), *provider_dir.glob("bulk_*.arrow")]:
+            try:
+                date_str = f.stem.split("_")[-1]
+                d = date(int(date_str[:4]), int(date_str[4:6]), int(date_str[6:8]))
+                if d < cutoff:
+                    f.unlink()
+                    removed += 1
+            except (ValueError, IndexError):
+                pass
 
     if removed:
         logger.info(f"{provider} キャッシュ: {removed} ファイル削除")
@@ -6,36 +6,45 @@ PCFRecord のリストに変換する。
 """
 from __future__ import annotations
 
+import hashlib
+import os
 import re
 import logging
-from datetime import date, datetime
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Optional
 
+import numpy as np
 import openpyxl
 import pandas as pd
+import pyarrow as pa
 
+import config
+import models
 from config import (
+    CACHE_DIR,
     EXCEL_PATH,
     EXCEL_SPECIAL_SHEETS,
     TOPIX_ETF_CODES,
     NIKKEI225_ETF_CODES,
 )
 from models import ETFMaster, PCFRecord, FuturesPosition
+from data import parser_futures
 from data.parser_futures import normalize_futures
 
 logger = logging.getLogger(__name__)
 
+# ETFコードとして妥当なシート名 (3-6文字の英数字)
+_CODE_RE = re.compile(r"^[0-9A-Za-z]{3,6}\Z")
+
+# ETFデータではない特殊シート名（完全一致）
+_SPECIAL_SHEETS = frozenset(EXCEL_SPECIAL_SHEETS)
+
 
 def _is_special_sheet(sheet_name: str) -> bool:
     """ETFデータではない特殊シートかどうかを判定"""
-    # 完全一致
-    if sheet_name in EXCEL_SPECIAL_SHEETS:
-        return True
-    # Chart_ で始まるシートもスキップ
-    if sheet_name.startswith("Chart_"):
-        return True
-    return False
+    # 完全一致、または Chart_ で始まるシート
+    return sheet_name in _SPECIAL_SHEETS or sheet_name.startswith("Chart_")
 
 
 def _extract_etf_code(sheet_name: str) -> Optional[str]:
@@ -54,44 +63,52 @@ def _extract_etf_code(sheet_name: str) -> Optional[str]:
         code_part = sheet_name.strip()
 
     # ETFコードとして妥当か (3-5文字の英数字)
-    if re.match(r"^[0-9A-Za-z]{3,6}$", code_part):
+    if _CODE_RE.match(code_part):
         return code_part
 
     return None
 
 
-def _to_date(value) -> Optional[date]:
-    """Excel セルの値を date に変換"""
-    if isinstance(value, datetime):
-        return value.date()
-    if isinstance(value, date):
-        return value
-    if isinstance(value, str):
-        try:
-            return datetime.strptime(value, "%Y-%m-%d").date()
-        except ValueError:
-            pass
-    return None
+# シートの列数: 日付, NAV, 口数, 現金, 株数, 株残高, 先物1 (種類, 枚数, 評価額), 先物2 (同)
+_SHEET_COLUMNS = 12
 
+# 先物の種類列に混入するヘッダー文字列
+_FUTURES_HEADER_NAMES = ("先物の種類1", "先物の種類2")
 
-def _to_float(value) -> Optional[float]:
-    """Excel セルの値を float に変換"""
-    if value is None:
-        return None
-    try:
-        return float(value)
-    except (ValueError, TypeError):
-        return None
 
+def _column_dates(values: pd.Series) -> pd.Series:
+    """Excel の日付列を date に一括変換（datetime / date / "YYYY-MM-DD" 以外は NaT）"""
+    return pd.to_datetime(values, errors="coerce", format="%Y-%m-%d").dt.normalize()
+
+
+def _column_floats(values: pd.Series) -> list[Optional[float]]:
+    """Excel の数値列を float のリストに一括変換（変換できない値は None）"""
+    # 整数だけの列でも int ではなく float で返す
+    numeric = pd.to_numeric(values, errors="coerce").astype("float64")
+    return numeric.astype(object).where(numeric.notna(), None).tolist()
+
+
+def _column_ints(values: pd.Series) -> list[Optional[int]]:
+    """Excel の数値列を int のリストに一括変換（小数は切り捨て、変換できない値は None）"""
+    numeric = np.trunc(pd.to_numeric(values, errors="coerce")).astype("Int64")
+    return numeric.astype(object).where(numeric.notna(), None).tolist()
 
-def _to_int(value) -> Optional[int]:
-    """Excel セルの値を int に変換"""
-    if value is None:
-        return None
-    try:
-        return int(float(value))
-    except (ValueError, TypeError):
-        return None
+
+def _column_names(values: pd.Series) -> list[Optional[str]]:
+    """先物の種類列を前後空白除去済みの文字列リストに変換（空・ヘッダー文字列は None）"""
+    names = values[values.notna() & (values != "")].astype(str).str.strip()
+    names = names[(names != "") & ~names.isin(_FUTURES_HEADER_NAMES)]
+    names = names.reindex(values.index).astype(object)
+    return names.where(names.notna(), None).tolist()
+
+
+# カテゴリ分類用のコード・先物種別の集合
+_TOPIX_CODES = frozenset(TOPIX_ETF_CODES)
+_NK225_CODES = frozenset(NIKKEI225_ETF_CODES)
+_TOPIX_FUTURES_TYPES = frozenset({"TOPIX", "MINI_TOPIX", "TOPIX_BANKS", "TOPIX_CORE30"})
+_NK225_FUTURES_TYPES = frozenset({
+    "NK225", "NK225_MINI", "NK225_MICRO", "NK225_OPTION_CALL", "NK225_OPTION_PUT",
+})
 
 
 def _classify_etf(code: str, futures_types: set[str]) -> str:
@@ -101,109 +118,290 @@ def _classify_etf(code: str, futures_types: set[str]) -> str:
     まず config の明示的マッピングを確認し、
     なければ先物データから推定する。
     """
-    if code in TOPIX_ETF_CODES:
+    if code in _TOPIX_CODES:
         return "topix"
-    if code in NIKKEI225_ETF_CODES:
+    if code in _NK225_CODES:
         return "nikkei225"
 
     # 先物データから推定
     if futures_types:
-        topix_types = {"TOPIX", "MINI_TOPIX", "TOPIX_BANKS", "TOPIX_CORE30"}
-        nk225_types = {"NK225", "NK225_MINI", "NK225_MICRO",
-                       "NK225_OPTION_CALL", "NK225_OPTION_PUT"}
-        if futures_types & topix_types:
+        if not _TOPIX_FUTURES_TYPES.isdisjoint(futures_types):
             return "topix"
-        if futures_types & nk225_types:
+        if not _NK225_FUTURES_TYPES.isdisjoint(futures_types):
             return "nikkei225"
 
     return "other"
 
 
-def import_sheet(ws, etf_code: str) -> list[PCFRecord]:
+class _WorkbookReader:
+    """
+    ワークブックのシート名・行データを読み出す。
+
+    python-calamine (Rust 実装) があれば使い、なければ openpyxl (read_only) で読む。
+    calamine は空セルを "" で返すが、import_sheet の判定は None / "" の両方を欠損として扱う。
     """
-    1つのワークシートからPCFRecordリストを生成する。
+
+    def __init__(self, excel_path: Path):
+        try:
+            from python_calamine import CalamineWorkbook
+        except ImportError:
+            CalamineWorkbook = None
+
+        if CalamineWorkbook is not None:
+            self._calamine = CalamineWorkbook.from_path(str(excel_path))
+            self._openpyxl = None
+            self.sheet_names: list[str] = list(self._calamine.sheet_names)
+        else:
+            logger.info("python-calamineが見つからないため openpyxl で読み込みます")
+            self._calamine = None
+            self._openpyxl = openpyxl.load_workbook(
+                str(excel_path), read_only=True, data_only=True
+            )
+            self.sheet_names = list(self._openpyxl.sheetnames)
+
+    def rows(self, sheet_name: str) -> Iterable[tuple | list]:
+        """シートの全行を値のシーケンスとして返す"""
+        if self._calamine is not None:
+            sheet = self._calamine.get_sheet_by_name(sheet_name)
+            return sheet.to_python(skip_empty_area=False)
+        # read_only + values_only ではセルオブジェクトを作らず値のタプルを返す。
+        # 使う列 (先頭 _SHEET_COLUMNS 列) より右のセルは取り出さない
+        return self._openpyxl[sheet_name].iter_rows(
+            max_col=_SHEET_COLUMNS, values_only=True
+        )
+
+    def close(self) -> None:
+        if self._openpyxl is not None:
+            self._openpyxl.close()
+
+
+def import_sheet(
+    rows: Iterable[tuple | list], etf_code: str,
+) -> tuple[list[PCFRecord], set[str]]:
+    """
+    1つのワークシートの行データからPCFRecordリストを生成する。
 
     Args:
-        ws: openpyxl ワークシート
+        rows: シートの行データ (各行はセル値のシーケンス)
         etf_code: ETFコード
 
     Returns:
-        PCFRecord のリスト (日付降順)
+        (PCFRecord のリスト (日付降順), シート内に現れた先物種別の集合)
     """
-    records = []
-    is_header = True
-
-    for row in ws.iter_rows(values_only=True):
-        # ヘッダー行をスキップ
-        if is_header:
-            is_header = False
-            # ヘッダー行かどうかの確認（最初のセルが文字列ならヘッダー）
-            if isinstance(row[0], str) and "日付" in str(row[0]):
-                continue
-            # ヘッダーでない場合はデータとして処理
-            is_header = False
-
-        pcf_date = _to_date(row[0])
-        if pcf_date is None:
-            continue
+    row_iter = (tuple(row[:_SHEET_COLUMNS]) for row in rows if row)
+    first = next(row_iter, None)
+    if first is None:
+        return [], set()
+
+    # ヘッダー行をスキップ（最初の行の先頭セルが「日付」を含む文字列ならヘッダー）
+    data = [] if isinstance(first[0], str) and "日付" in first[0] else [first]
+    data.extend(row_iter)
+    if not data:
+        return [], set()
+
+    # 列ごとに型変換する（短い行は欠損で埋める）
+    frame = pd.DataFrame(data).reindex(columns=range(_SHEET_COLUMNS))
+
+    dates = _column_dates(frame[0])
+    frame = frame[dates.notna()]
+    if frame.empty:
+        return [], set()
+
+    columns = zip(
+        dates[dates.notna()].dt.date.tolist(),
+        _column_floats(frame[1]),
+        _column_ints(frame[2]),
+        _column_floats(frame[3]),
+        _column_ints(frame[4]),
+        _column_floats(frame[5]),
+        _column_names(frame[6]), _column_ints(frame[7]), _column_floats(frame[8]),
+        _column_names(frame[9]), _column_ints(frame[10]), _column_floats(frame[11]),
+    )
 
-        # 先物ポジション
-        futures_positions = []
-
-        # 先物1 (Col 6, 7, 8)
-        if len(row) > 6 and row[6] is not None:
-            raw_name = str(row[6]).strip()
-            # ヘッダー文字列が混入するケースを除外
-            if raw_name and raw_name not in ("先物の種類1", "先物の種類2"):
-                qty = _to_int(row[7]) if len(row) > 7 else 0
-                mv = _to_float(row[8]) if len(row) > 8 else 0.0
-                fp = normalize_futures(raw_name, qty or 0, mv or 0.0)
-                futures_positions.append(fp)
-
-        # 先物2 (Col 9, 10, 11)
-        if len(row) > 9 and row[9] is not None:
-            raw_name = str(row[9]).strip()
-            if raw_name and raw_name not in ("先物の種類1", "先物の種類2"):
-                qty = _to_int(row[10]) if len(row) > 10 else 0
-                mv = _to_float(row[11]) if len(row) > 11 else 0.0
-                fp = normalize_futures(raw_name, qty or 0, mv or 0.0)
-                futures_positions.append(fp)
-
-        record = PCFRecord(
+    records = []
+    futures_types: set[str] = set()
+    for (pcf_date, nav, shares, cash, equity_count, equity_mv,
+         name1, qty1, mv1, name2, qty2, mv2) in columns:
+        # 先物ポジション（先物1, 先物2）
+        futures_positions = [
+            normalize_futures(name, qty or 0, mv or 0.0)
+            for name, qty, mv in ((name1, qty1, mv1), (name2, qty2, mv2))
+            if name is not None
+        ]
+        for fp in futures_positions:
+            futures_types.add(fp.futures_type)
+
+        records.append(PCFRecord(
             etf_code=etf_code,
             pcf_date=pcf_date,
-            nav=_to_float(row[1]),
-            shares_outstanding=_to_int(row[2]),
-            cash_component=_to_float(row[3]),
-            equity_count_tse=_to_int(row[4]) if len(row) > 4 else None,
-            equity_market_value=_to_float(row[5]) if len(row) > 5 else None,
+            nav=nav,
+            shares_outstanding=shares,
+            cash_component=cash,
+            equity_count_tse=equity_count,
+            equity_market_value=equity_mv,
             futures_positions=futures_positions,
-        )
-        records.append(record)
+        ))
+
+    return records, futures_types
+
+
+# ワーカープロセスごとに開いたワークブック（_init_sheet_worker で設定）
+_worker_workbook: Optional[_WorkbookReader] = None
+
+
+def _init_sheet_worker(excel_path: Path) -> None:
+    """ワーカープロセスの初期化: ワークブックを1回だけ開いて使い回す"""
+    global _worker_workbook
+    _worker_workbook = _WorkbookReader(excel_path)
+
+
+def _parse_sheet_worker(task: tuple[str, str]) -> tuple[list[PCFRecord], set[str]]:
+    """ワーカープロセスで1シートを解析する"""
+    sheet_name, etf_code = task
+    return import_sheet(_worker_workbook.rows(sheet_name), etf_code)
+
+
+def _importer_digest() -> str:
+    """
+    解析結果に影響するソースのハッシュ。
+
+    このモジュールや先物の正規化、config.py（先物の掛け目・ETFコード一覧）が
+    変更されたら古いキャッシュを使わないよう、キーに含める。
+    """
+    h = hashlib.blake2b(digest_size=8)
+    for source in (__file__, parser_futures.__file__, models.__file__,
+                   config.__file__):
+        h.update(Path(source).read_bytes())
+    return h.hexdigest()
+
+
+def _import_cache_paths(excel_path: Path) -> tuple[Path, Path]:
+    """
+    Excel読み込み結果のキャッシュファイルパス (レコード, マスタ) を返す。
+
+    キーはファイルパス・更新時刻・サイズと解析処理のソースのハッシュで、
+    Excelが更新されるか解析処理が変わると別のキャッシュになる。
+    """
+    stat = excel_path.stat()
+    key = (
+        f"{excel_path.resolve()}:{stat.st_mtime_ns}:{stat.st_size}"
+        f":{_importer_digest()}"
+    )
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    cache_dir = CACHE_DIR / "excel_import"
+    return (
+        cache_dir / f"{digest}.records.parquet",
+        cache_dir / f"{digest}.masters.parquet",
+    )
+
+
+def _optional(value):
+    """DataFrame の欠損値 (NaN/None) を None に変換"""
+    return None if pd.isna(value) else value
 
+
+def _optional_int(value) -> Optional[int]:
+    """DataFrame の数値 (float 化された整数を含む) を int に変換"""
+    return None if pd.isna(value) else int(value)
+
+
+def _records_from_dataframe(df: pd.DataFrame) -> list[PCFRecord]:
+    """records_to_dataframe の出力から PCFRecord リストを復元する"""
+    records = []
+    for row in df.to_dict("records"):
+        futures_positions = [
+            FuturesPosition(
+                raw_name=row[f"futures{n}_raw_name"],
+                futures_type=row[f"futures{n}_type"],
+                contract_month=_optional(row[f"futures{n}_contract_month"]),
+                quantity=_optional_int(row[f"futures{n}_quantity"]),
+                market_value=_optional(row[f"futures{n}_market_value"]),
+                multiplier=_optional_int(row[f"futures{n}_multiplier"]),
+            )
+            for n in (1, 2)
+            if _optional(row[f"futures{n}_type"]) is not None
+        ]
+        records.append(PCFRecord(
+            etf_code=row["etf_code"],
+            pcf_date=row["date"].date(),
+            nav=_optional(row["nav"]),
+            shares_outstanding=_optional_int(row["shares_outstanding"]),
+            cash_component=_optional(row["cash_component"]),
+            equity_count_tse=_optional_int(row["equity_count_tse"]),
+            equity_market_value=_optional(row["equity_market_value"]),
+            futures_positions=futures_positions,
+        ))
     return records
 
 
-def import_excel(excel_path: Path = EXCEL_PATH) -> tuple[list[PCFRecord], list[ETFMaster]]:
+def import_excel(
+    excel_path: Path = EXCEL_PATH,
+    max_workers: Optional[int] = None,
+    use_cache: bool = True,
+) -> tuple[list[PCFRecord], list[ETFMaster]]:
     """
     既存Excelの全ETFシートからデータを読み込む。
 
+    シート同士は独立しているため、シートの解析はプロセスプールで並列に行う。
+    解析結果は Parquet にキャッシュし、Excelが変わっていなければ再解析しない。
+
     Args:
         excel_path: Excelファイルパス
+        max_workers: 並列プロセス数 (Noneなら CPU 数、1なら逐次処理)
+        use_cache: 解析結果のキャッシュを使うか
 
     Returns:
         (全PCFRecordリスト, ETFMasterリスト)
     """
+    if not use_cache:
+        return _parse_excel(excel_path, max_workers)
+
+    records_path, masters_path = _import_cache_paths(excel_path)
+    if records_path.exists() and masters_path.exists():
+        records_df = pd.read_parquet(records_path, engine="pyarrow")
+        masters_df = pd.read_parquet(masters_path, engine="pyarrow")
+        all_records = _records_from_dataframe(records_df)
+        masters = [ETFMaster(**row) for row in masters_df.to_dict("records")]
+        logger.info(
+            f"Excel読み込み (キャッシュ): {len(masters)} ETF, "
+            f"{len(all_records)} レコード ({records_path.name})"
+        )
+        return all_records, masters
+
+    all_records, masters = _parse_excel(excel_path, max_workers)
+
+    try:
+        records_path.parent.mkdir(parents=True, exist_ok=True)
+        # 解析直後と同じ順 (シート順) で復元できるよう、並べ替えずに保存する
+        _records_frame(all_records).to_parquet(
+            records_path, index=False, engine="pyarrow"
+        )
+        masters_to_dataframe(masters).to_parquet(
+            masters_path, index=False, engine="pyarrow"
+        )
+        logger.info(f"Excel読み込みキャッシュ保存: {records_path.name}")
+    except Exception as e:
+        logger.warning(f"Excel読み込みキャッシュ保存失敗: {e}")
+
+    return all_records, masters
+
+
+def _parse_excel(
+    excel_path: Path,
+    max_workers: Optional[int] = None,
+) -> tuple[list[PCFRecord], list[ETFMaster]]:
+    """Excelの全ETFシートを解析する（import_excel の本体）"""
     logger.info(f"Excel読み込み開始: {excel_path}")
-    wb = openpyxl.load_workbook(str(excel_path), read_only=True, data_only=True)
+    wb = _WorkbookReader(excel_path)
 
     all_records: list[PCFRecord] = []
     masters: list[ETFMaster] = []
     skipped = []
+    tasks: list[tuple[str, str]] = []
 
-    for i, sheet_name in enumerate(wb.sheetnames):
-        # 特殊シートをスキップ
-        if _is_special_sheet(sheet_name):
+    for sheet_name in wb.sheet_names:
+        # 特殊シートをスキップ（_is_special_sheet と同じ判定をインライン化）
+        if sheet_name in _SPECIAL_SHEETS or sheet_name.startswith("Chart_"):
             skipped.append(sheet_name)
             continue
 
@@ -213,33 +411,46 @@ def import_excel(excel_path: Path = EXCEL_PATH) -> tuple[list[PCFRecord], list[E
             skipped.append(sheet_name)
             continue
 
-        ws = wb[sheet_name]
-        records = import_sheet(ws, etf_code)
-
-        if records:
-            all_records.extend(records)
-
-            # 先物種別を収集
-            futures_types = set()
-            has_futures = False
-            for r in records:
-                for fp in r.futures_positions:
-                    futures_types.add(fp.futures_type)
-                    has_futures = True
+        tasks.append((sheet_name, etf_code))
 
-            category = _classify_etf(etf_code, futures_types)
-            masters.append(ETFMaster(
-                code=etf_code,
-                name=sheet_name,
-                provider="excel_import",
-                category=category,
-                has_futures=has_futures,
-            ))
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
 
-        if (i + 1) % 50 == 0:
-            logger.info(f"  {i + 1}/{len(wb.sheetnames)} シート処理済み")
+    if max_workers <= 1 or len(tasks) <= 1:
+        results = (import_sheet(wb.rows(name), code) for name, code in tasks)
+        executor = None
+    else:
+        wb.close()
+        executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_sheet_worker,
+            initargs=(excel_path,),
+        )
+        results = executor.map(_parse_sheet_worker, tasks, chunksize=8)
 
-    wb.close()
+    try:
+        for i, ((sheet_name, etf_code), (records, futures_types)) in enumerate(
+            zip(tasks, results)
+        ):
+            if records:
+                all_records.extend(records)
+
+                category = _classify_etf(etf_code, futures_types)
+                masters.append(ETFMaster(
+                    code=etf_code,
+                    name=sheet_name,
+                    provider="excel_import",
+                    category=category,
+                    has_futures=bool(futures_types),
+                ))
+
+            if (i + 1) % 50 == 0:
+                logger.info(f"  {i + 1}/{len(tasks)} シート処理済み")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        else:
+            wb.close()
 
     logger.info(
         f"Excel読み込み完了: {len(masters)} ETF, "
@@ -250,77 +461,94 @@ def import_excel(excel_path: Path = EXCEL_PATH) -> tuple[list[PCFRecord], list[E
 
 
 def records_to_dataframe(records: list[PCFRecord]) -> pd.DataFrame:
+    """PCFRecordリストをDataFrameに変換する（etf_code, date 順）"""
+    df = _records_frame(records)
+    if df.empty:
+        return df
+    return df.sort_values(["etf_code", "date"]).reset_index(drop=True)
+
+
+def _records_frame(records: list[PCFRecord]) -> pd.DataFrame:
     """
-    PCFRecordリストをDataFrameに変換する。
+    PCFRecordリストを並べ替えずにDataFrameに変換する。
 
     先物ポジションは固定列（先物1, 先物2）として展開する。
+    行ごとの dict を作らず、列ごとのリストに1パスで詰めてから
+    Arrow テーブル経由で DataFrame を作る（列の型は値から推定）。
     """
-    rows = []
-    for r in records:
-        row = {
-            "etf_code": r.etf_code,
-            "date": r.pcf_date,
-            "nav": r.nav,
-            "shares_outstanding": r.shares_outstanding,
-            "cash_component": r.cash_component,
-            "equity_count_tse": r.equity_count_tse,
-            "equity_market_value": r.equity_market_value,
-            "nav_per_unit": r.nav_per_unit,
-        }
-
-        # 先物1
-        if len(r.futures_positions) >= 1:
-            fp = r.futures_positions[0]
-            row["futures1_raw_name"] = fp.raw_name
-            row["futures1_type"] = fp.futures_type
-            row["futures1_contract_month"] = fp.contract_month
-            row["futures1_quantity"] = fp.quantity
-            row["futures1_market_value"] = fp.market_value
-            row["futures1_multiplier"] = fp.multiplier
-        else:
-            row["futures1_raw_name"] = None
-            row["futures1_type"] = None
-            row["futures1_contract_month"] = None
-            row["futures1_quantity"] = None
-            row["futures1_market_value"] = None
-            row["futures1_multiplier"] = None
-
-        # 先物2
-        if len(r.futures_positions) >= 2:
-            fp = r.futures_positions[1]
-            row["futures2_raw_name"] = fp.raw_name
-            row["futures2_type"] = fp.futures_type
-            row["futures2_contract_month"] = fp.contract_month
-            row["futures2_quantity"] = fp.quantity
-            row["futures2_market_value"] = fp.market_value
-            row["futures2_multiplier"] = fp.multiplier
-        else:
-            row["futures2_raw_name"] = None
-            row["futures2_type"] = None
-            row["futures2_contract_month"] = None
-            row["futures2_quantity"] = None
-            row["futures2_market_value"] = None
-            row["futures2_multiplier"] = None
-
-        rows.append(row)
-
-    df = pd.DataFrame(rows)
-    if not df.empty:
-        df["date"] = pd.to_datetime(df["date"])
-        df = df.sort_values(["etf_code", "date"]).reset_index(drop=True)
-
+    n = len(records)
+    columns: dict[str, list] = {
+        "etf_code": [None] * n,
+        "date": [None] * n,
+        "nav": [None] * n,
+        "shares_outstanding": [None] * n,
+        "cash_component": [None] * n,
+        "equity_count_tse": [None] * n,
+        "equity_market_value": [None] * n,
+        "nav_per_unit": [None] * n,
+    }
+    futures_fields = [
+        ("raw_name", "raw_name"),
+        ("type", "futures_type"),
+        ("contract_month", "contract_month"),
+        ("quantity", "quantity"),
+        ("market_value", "market_value"),
+        ("multiplier", "multiplier"),
+    ]
+    # 先物1, 先物2 の列 (列リスト, FuturesPosition の属性名)
+    futures_columns = []
+    for slot in (1, 2):
+        slot_columns = []
+        for suffix, attr in futures_fields:
+            col = [None] * n
+            columns[f"futures{slot}_{suffix}"] = col
+            slot_columns.append((col, attr))
+        futures_columns.append(slot_columns)
+
+    etf_code = columns["etf_code"]
+    dates = columns["date"]
+    nav = columns["nav"]
+    shares = columns["shares_outstanding"]
+    cash = columns["cash_component"]
+    equity_count = columns["equity_count_tse"]
+    equity_mv = columns["equity_market_value"]
+    nav_per_unit = columns["nav_per_unit"]
+
+    for i, r in enumerate(records):
+        etf_code[i] = r.etf_code
+        dates[i] = r.pcf_date
+        nav[i] = r.nav
+        shares[i] = r.shares_outstanding
+        cash[i] = r.cash_component
+        equity_count[i] = r.equity_count_tse
+        equity_mv[i] = r.equity_market_value
+        nav_per_unit[i] = r.nav_per_unit
+
+        for fp, slot_columns in zip(r.futures_positions, futures_columns):
+            for col, attr in slot_columns:
+                col[i] = getattr(fp, attr)
+
+    if n == 0:
+        return pd.DataFrame()
+
+    # 列ごとに Arrow 配列へ変換し、ブロックを統合せずに DataFrame 化する
+    table = pa.Table.from_pydict(columns)
+    columns.clear()
+    df = table.to_pandas(split_blocks=True, self_destruct=True, date_as_object=False)
+    del table
+
+    df["date"] = pd.to_datetime(df["date"])
     return df
 
 
 def masters_to_dataframe(masters: list[ETFMaster]) -> pd.DataFrame:
-    """ETFMasterリストをDataFrameに変換する"""
-    rows = []
-    for m in masters:
-        rows.append({
-            "code": m.code,
-            "name": m.name,
-            "provider": m.provider,
-            "category": m.category,
-            "has_futures": m.has_futures,
-        })
-    return pd.DataFrame(rows)
+    """ETFMasterリストをDataFrameに変換する（行ごとの dict を作らず列から組み立てる）"""
+    return pd.DataFrame({
+        "code": [m.code for m in masters],
+        "name": [m.name for m in masters],
+        "provider": [m.provider for m in masters],
+        "category": [m.category for m in masters],
+        "has_futures": np.fromiter(
+            (m.has_futures for m in masters), dtype=bool, count=len(masters)
+        ),
+    })
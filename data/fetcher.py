@@ -9,20 +9,33 @@ PCF CSVを取得する。
 from __future__ import annotations
 
 import logging
+import re
+import tempfile
+import threading
 import time
-import io
 import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date, datetime
 from typing import Optional
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from config import (
     ICE_PCF_URL, ICE_BULK_ZIP_URL, ICE_LIST_ZIPS_URL,
     SOLACTIVE_SINGLE_URL, SOLACTIVE_BULK_URL,
     SPGLOBAL_FILEDATES_URL, SPGLOBAL_FILE_URL, SPGLOBAL_HEADERS,
 )
-from data.cache import get_cached_csv, save_to_cache
+from data.cache import (
+    get_cached_bulk,
+    get_cached_csv,
+    get_cached_etf_codes,
+    get_cache_validators,
+    save_bulk_to_cache,
+    save_cache_validators,
+    save_etf_codes,
+    save_to_cache,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -30,36 +43,146 @@ logger = logging.getLogger(__name__)
 REQUEST_TIMEOUT = 30  # 秒
 REQUEST_INTERVAL = 0.5  # リクエスト間隔（秒）
 MAX_RETRIES = 3
+ZIP_SPOOL_MAX_SIZE = 16 << 20  # 一括ZIPをメモリに保持する上限（超過分は一時ファイル）
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+FETCH_WORKERS = 4  # 複数ETF取得時の並列数
 
 HEADERS = {
     "Accept": "text/csv,text/plain,*/*",
 }
 
+# 接続 (TCP/TLS) を再利用する共有セッション（並列取得のスレッド間で共用）
+# HTTP/1.1 keep-alive で接続確立は各ホスト数回に限られ、リクエスト開始は
+# REQUEST_INTERVAL で間隔制御しているため、HTTP/2 の多重化でも待ち時間は縮まらない
+_SESSION = requests.Session()
+for _prefix in ("https://", "http://"):
+    _SESSION.mount(_prefix, HTTPAdapter(pool_connections=16, pool_maxsize=16))
+
+# リクエスト開始間隔の制御（スレッド間で共有）
+_throttle_lock = threading.Lock()
+_next_request_at = 0.0
+
+# ICE listOfZips 内の ZIP ファイル名 (例: "all_pcf_20260217.zip")
+_ICE_ZIP_DATE_RE = re.compile(r"all_pcf_(\d{8})\.zip")
+# ICE 一括ZIP内のCSVファイル名 (例: "1306tsepcf_Feb122026.csv")
+_ICE_NAME_RE = re.compile(r"^(\w+?)(?:tsepcf|osepcf)_")
+# JPX ページ内の ICE / Solactive PCF ダウンロードリンク（HTMLのバイト列に対して検索）
+_JPX_PCF_LINK_RE = re.compile(
+    rb"(?:inav\.ice\.com/pcf-download/"
+    rb"|solactive\.com/downloads/etfservices/tse-pcf/single/)(\w+)\.csv"
+)
+
+
+# UTF-8 で変換できなかったCSVのエンコーディング候補（先頭から順に試す）
+# UTF-8 は厳密に検証できるため最初に試し、失敗時のみ Shift_JIS 系へ進む
+CSV_FALLBACK_ENCODINGS = ("shift_jis", "cp932")
+
+
+def _decode_csv(
+    content: bytes, fallbacks: tuple[str, ...] = CSV_FALLBACK_ENCODINGS,
+) -> str:
+    """
+    CSVのバイト列を文字列に変換する。
+
+    大半のファイルは UTF-8 なので、まず UTF-8 で1回だけ変換を試す。
+    失敗した場合のみ fallbacks を順に試し、いずれでも変換できない場合は
+    UTF-8 で不正バイトを置換する。
+    """
+    try:
+        return content.decode("utf-8")
+    except UnicodeDecodeError:
+        pass
+    for enc in fallbacks:
+        try:
+            return content.decode(enc)
+        except (UnicodeDecodeError, LookupError):
+            continue
+    return content.decode("utf-8", errors="replace")
+
+
+def _throttle() -> None:
+    """直前のリクエスト開始から REQUEST_INTERVAL 秒以上空けてから戻る"""
+    global _next_request_at
+    with _throttle_lock:
+        now = time.monotonic()
+        wait = _next_request_at - now
+        _next_request_at = max(now, _next_request_at) + REQUEST_INTERVAL
+    if wait > 0:
+        time.sleep(wait)
+
+
+def _download_spooled(
+    url: str, headers: dict, timeout: int = 60,
+) -> tuple[int, Optional[tempfile.SpooledTemporaryFile]]:
+    """
+    レスポンス本体をストリーミングで一時領域に書き出す（一括ZIP用）。
+
+    ZIP全体を resp.content としてメモリに載せず、ZIP_SPOOL_MAX_SIZE を超える分は
+    一時ファイルに退避する。zipfile はシーク可能な入力を要するためファイルとして返す。
+
+    Returns:
+        (HTTPステータス, 先頭にシーク済みの本体)。200 以外の場合、本体は None
+    """
+    with _SESSION.get(url, headers=headers, timeout=timeout, stream=True) as resp:
+        if resp.status_code != 200:
+            return resp.status_code, None
+        body = tempfile.SpooledTemporaryFile(max_size=ZIP_SPOOL_MAX_SIZE)
+        for chunk in resp.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+            body.write(chunk)
+    body.seek(0)
+    return 200, body
+
+
+# 条件付きGETで 304 Not Modified が返ったことを示す番兵
+_NOT_MODIFIED = object()
+
+
+def _request_with_retry(
+    url: str, retries: int = MAX_RETRIES, validators: Optional[dict] = None,
+):
+    """
+    リトライ付きHTTPリクエスト
+
+    validators ({"etag", "last_modified"}) を渡すと If-None-Match /
+    If-Modified-Since を付けた条件付きGETを行う。304 の場合は _NOT_MODIFIED を返し、
+    200 の場合は応答の ETag / Last-Modified で validators を更新する。
+
+    Returns:
+        CSVテキスト、_NOT_MODIFIED、または失敗時 None
+    """
+    headers = HEADERS
+    if validators:
+        conditional = {}
+        if validators.get("etag"):
+            conditional["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            conditional["If-Modified-Since"] = validators["last_modified"]
+        if conditional:
+            headers = {**HEADERS, **conditional}
 
-def _request_with_retry(url: str, retries: int = MAX_RETRIES) -> Optional[str]:
-    """リトライ付きHTTPリクエスト"""
     for attempt in range(retries):
         try:
-            resp = requests.get(url, headers=HEADERS, timeout=REQUEST_TIMEOUT)
+            _throttle()
+            resp = _SESSION.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+
+            if resp.status_code == 304 and headers is not HEADERS:
+                logger.debug(f"304 Not Modified: {url}")
+                return _NOT_MODIFIED
 
             if resp.status_code == 200:
                 # エンコーディング推定
-                content = resp.content
-                text = None
-                for enc in ["utf-8", "shift_jis", "cp932", "latin-1"]:
-                    try:
-                        text = content.decode(enc)
-                        break
-                    except (UnicodeDecodeError, LookupError):
-                        continue
-                if text is None:
-                    text = content.decode("utf-8", errors="replace")
+                text = _decode_csv(
+                    resp.content, (*CSV_FALLBACK_ENCODINGS, "latin-1")
+                )
 
                 # HTMLレスポンスの検出（営業時間外等）
                 if text.strip().startswith("<html") or text.strip().startswith("<!"):
                     logger.warning(f"HTMLレスポンス検出 (営業時間外?): {url}")
                     return None
 
+                if validators is not None:
+                    validators["etag"] = resp.headers.get("ETag")
+                    validators["last_modified"] = resp.headers.get("Last-Modified")
                 return text
 
             elif resp.status_code == 404:
@@ -96,6 +219,46 @@ def _request_with_retry(url: str, retries: int = MAX_RETRIES) -> Optional[str]:
     return None
 
 
+def _fetch_single_csv(
+    provider: str, etf_code: str, target_date: date, url: str,
+) -> Optional[str]:
+    """
+    銘柄単位のCSVを条件付きGETでダウンロードし、キャッシュに保存する。
+
+    URLは日付を含まず常に最新版を返すため、前回ダウンロード時の ETag /
+    Last-Modified を送り、304 なら前回のキャッシュCSVを本文の代わりに使う。
+    """
+    validators = get_cache_validators(provider, etf_code)
+    if "date" not in validators:
+        validators = {}
+    csv_text = _request_with_retry(url, validators=validators)
+
+    if csv_text is _NOT_MODIFIED:
+        prev_date = datetime.strptime(validators["date"], "%Y%m%d").date()
+        csv_text = get_cached_csv(provider, etf_code, prev_date)
+        if csv_text is None:
+            # 前回のCSVが削除済みなら通常のGETで取り直す
+            validators = {}
+            csv_text = _request_with_retry(url, validators=validators)
+
+    if csv_text:
+        save_to_cache(provider, etf_code, target_date, csv_text)
+        save_cache_validators(provider, etf_code, target_date, validators)
+
+    return csv_text
+
+
+def _get_settled_bulk(provider: str, target_date: date) -> Optional[dict[str, str]]:
+    """
+    過去日付の一括キャッシュを返す。
+
+    当日分の一括ZIPは日中に更新されうるため、キャッシュを使わず毎回取り直す。
+    """
+    if target_date >= date.today():
+        return None
+    return get_cached_bulk(provider, target_date)
+
+
 # ============================================================
 # ICE Data Services
 # ============================================================
@@ -107,10 +270,9 @@ def fetch_ice_filedates() -> list[str]:
         日付文字列のリスト (例: ["20260217", "20260216", ...])
     """
     try:
-        resp = requests.get(ICE_LIST_ZIPS_URL, headers=HEADERS, timeout=REQUEST_TIMEOUT)
+        resp = _SESSION.get(ICE_LIST_ZIPS_URL, headers=HEADERS, timeout=REQUEST_TIMEOUT)
         if resp.status_code == 200:
-            import re
-            dates = re.findall(r"all_pcf_(\d{8})\.zip", resp.text)
+            dates = _ICE_ZIP_DATE_RE.findall(resp.text)
             logger.info(f"ICE 利用可能日付: {len(dates)} 件")
             return dates
         else:
@@ -131,46 +293,41 @@ def fetch_ice_bulk(target_date: date) -> dict[str, str]:
     Returns:
         {ETFコード: CSVテキスト} の辞書
     """
+    cached = _get_settled_bulk("ice", target_date)
+    if cached:
+        return cached
+
     date_str = target_date.strftime("%Y%m%d")
     url = ICE_BULK_ZIP_URL.format(date=date_str)
     logger.info(f"ICE一括ダウンロード: all_pcf_{date_str}.zip")
 
     try:
-        resp = requests.get(
+        status, body = _download_spooled(
             url, headers={**HEADERS, "Cache-Control": "no-cache, no-store"},
-            timeout=60,
         )
-        if resp.status_code != 200:
-            logger.warning(f"ICE一括ダウンロード失敗: HTTP {resp.status_code}")
+        if body is None:
+            logger.warning(f"ICE一括ダウンロード失敗: HTTP {status}")
             return {}
 
         results = {}
-        with zipfile.ZipFile(io.BytesIO(resp.content)) as zf:
+        with body, zipfile.ZipFile(body) as zf:
             for name in zf.namelist():
                 if not name.endswith(".csv"):
                     continue
 
                 # ファイル名: "1306tsepcf_Feb122026.csv" or "1321osepcf_Feb162026.csv" -> ETFコード
-                import re
-                m = re.match(r"^(\w+?)(?:tsepcf|osepcf)_", name)
+                m = _ICE_NAME_RE.match(name)
                 if m:
                     etf_code = m.group(1)
                 else:
                     etf_code = name.replace(".csv", "").split("_")[0]
 
-                csv_bytes = zf.read(name)
-                for enc in ["utf-8", "shift_jis", "cp932"]:
-                    try:
-                        csv_text = csv_bytes.decode(enc)
-                        break
-                    except UnicodeDecodeError:
-                        continue
-                else:
-                    csv_text = csv_bytes.decode("utf-8", errors="replace")
+                csv_text = _decode_csv(zf.read(name))
 
                 results[etf_code] = csv_text
-                save_to_cache("ice", etf_code, target_date, csv_text)
 
+        if results:
+            save_bulk_to_cache("ice", target_date, results)
         logger.info(f"ICE一括ダウンロード完了: {len(results)} ファイル")
         return results
 
@@ -201,12 +358,7 @@ def fetch_ice_pcf(etf_code: str, target_date: date = None) -> Optional[str]:
     url = ICE_PCF_URL.format(code=etf_code)
     logger.info(f"ICE PCFダウンロード: {etf_code}")
 
-    csv_text = _request_with_retry(url)
-    if csv_text:
-        save_to_cache("ice", etf_code, target_date, csv_text)
-        time.sleep(REQUEST_INTERVAL)
-
-    return csv_text
+    return _fetch_single_csv("ice", etf_code, target_date, url)
 
 
 # ============================================================
@@ -233,12 +385,7 @@ def fetch_solactive_pcf(etf_code: str, target_date: date = None) -> Optional[str
     url = SOLACTIVE_SINGLE_URL.format(code=etf_code)
     logger.info(f"Solactive PCFダウンロード: {etf_code}")
 
-    csv_text = _request_with_retry(url)
-    if csv_text:
-        save_to_cache("solactive", etf_code, target_date, csv_text)
-        time.sleep(REQUEST_INTERVAL)
-
-    return csv_text
+    return _fetch_single_csv("solactive", etf_code, target_date, url)
 
 
 def fetch_spglobal_filedates() -> list[str]:
@@ -249,7 +396,7 @@ def fetch_spglobal_filedates() -> list[str]:
         日付文字列のリスト (例: ["2026/02/17", "2026/02/16", ...])
     """
     try:
-        resp = requests.get(
+        resp = _SESSION.get(
             SPGLOBAL_FILEDATES_URL,
             headers=SPGLOBAL_HEADERS,
             timeout=REQUEST_TIMEOUT,
@@ -276,22 +423,24 @@ def fetch_spglobal_bulk(target_date: date) -> dict[str, str]:
     Returns:
         {ETFコード: CSVテキスト} の辞書
     """
+    cached = _get_settled_bulk("spglobal", target_date)
+    if cached:
+        return cached
+
     date_str = target_date.strftime("%Y%m%d")
     zip_filename = f"all_pcf_{date_str}.zip"
     url = f"{SPGLOBAL_FILE_URL}?filename={zip_filename}"
     logger.info(f"S&P Global一括ダウンロード: {zip_filename}")
 
     try:
-        resp = requests.get(url, headers=SPGLOBAL_HEADERS, timeout=60)
-        if resp.status_code != 200:
-            logger.warning(
-                f"S&P Global一括ダウンロード失敗: HTTP {resp.status_code}"
-            )
+        status, body = _download_spooled(url, headers=SPGLOBAL_HEADERS)
+        if body is None:
+            logger.warning(f"S&P Global一括ダウンロード失敗: HTTP {status}")
             return {}
 
         # ZIP解凍
         results = {}
-        with zipfile.ZipFile(io.BytesIO(resp.content)) as zf:
+        with body, zipfile.ZipFile(body) as zf:
             for name in zf.namelist():
                 if not name.endswith(".csv"):
                     continue
@@ -300,19 +449,12 @@ def fetch_spglobal_bulk(target_date: date) -> dict[str, str]:
                 basename = name.split("/")[-1].replace(".csv", "")
                 etf_code = basename.split("_")[0]
 
-                csv_bytes = zf.read(name)
-                for enc in ["utf-8", "shift_jis", "cp932"]:
-                    try:
-                        csv_text = csv_bytes.decode(enc)
-                        break
-                    except UnicodeDecodeError:
-                        continue
-                else:
-                    csv_text = csv_bytes.decode("utf-8", errors="replace")
+                csv_text = _decode_csv(zf.read(name))
 
                 results[etf_code] = csv_text
-                save_to_cache("spglobal", etf_code, target_date, csv_text)
 
+        if results:
+            save_bulk_to_cache("spglobal", target_date, results)
         logger.info(f"S&P Global一括ダウンロード完了: {len(results)} ファイル")
         return results
 
@@ -331,6 +473,10 @@ def fetch_solactive_bulk(target_date: date) -> dict[str, str]:
     Returns:
         {ETFコード: CSVテキスト} の辞書
     """
+    cached = _get_settled_bulk("solactive", target_date)
+    if cached:
+        return cached
+
     url = SOLACTIVE_BULK_URL.format(
         yyyy=target_date.strftime("%Y"),
         mm=target_date.strftime("%m"),
@@ -339,31 +485,23 @@ def fetch_solactive_bulk(target_date: date) -> dict[str, str]:
     logger.info(f"Solactive一括ダウンロード: {url}")
 
     try:
-        resp = requests.get(url, headers=HEADERS, timeout=60)
-        if resp.status_code != 200:
-            logger.warning(f"Solactive一括ダウンロード失敗: HTTP {resp.status_code}")
+        status, body = _download_spooled(url, headers=HEADERS)
+        if body is None:
+            logger.warning(f"Solactive一括ダウンロード失敗: HTTP {status}")
             return {}
 
         results = {}
-        with zipfile.ZipFile(io.BytesIO(resp.content)) as zf:
+        with body, zipfile.ZipFile(body) as zf:
             for name in zf.namelist():
                 if name.endswith(".csv"):
                     # ファイル名からETFコードを抽出 (例: "2640.csv" -> "2640")
                     etf_code = name.replace(".csv", "").split("/")[-1]
-                    csv_bytes = zf.read(name)
-
-                    for enc in ["utf-8", "shift_jis", "cp932"]:
-                        try:
-                            csv_text = csv_bytes.decode(enc)
-                            break
-                        except UnicodeDecodeError:
-                            continue
-                    else:
-                        csv_text = csv_bytes.decode("utf-8", errors="replace")
+                    csv_text = _decode_csv(zf.read(name))
 
                     results[etf_code] = csv_text
-                    save_to_cache("solactive", etf_code, target_date, csv_text)
 
+        if results:
+            save_bulk_to_cache("solactive", target_date, results)
         logger.info(f"Solactive一括ダウンロード完了: {len(results)} ファイル")
         return results
 
@@ -411,10 +549,14 @@ def fetch_all_pcf(
     etf_codes: list[str],
     provider: str = "ice",
     target_date: date = None,
+    max_workers: int = FETCH_WORKERS,
 ) -> dict[str, str]:
     """
     複数ETFのPCFを一括取得する。
 
+    ダウンロードはスレッドプールで並列に行う。
+    リクエスト開始間隔は _throttle で全スレッド共通に REQUEST_INTERVAL 秒以上空ける。
+
     Returns:
         {ETFコード: CSVテキスト} の辞書
     """
@@ -422,17 +564,24 @@ def fetch_all_pcf(
         target_date = date.today()
 
     results = {}
-    failed = []
 
-    for i, code in enumerate(etf_codes):
-        csv_text = fetch_pcf(code, provider, target_date)
-        if csv_text:
-            results[code] = csv_text
-        else:
-            failed.append(code)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(fetch_pcf, code, provider, target_date): code
+            for code in etf_codes
+        }
+        # 完了した順に回収する（遅いリクエストが後続の集計を待たせない）
+        for i, future in enumerate(as_completed(futures)):
+            csv_text = future.result()
+            if csv_text:
+                results[futures[future]] = csv_text
+
+            if (i + 1) % 10 == 0:
+                logger.info(f"  {i + 1}/{len(etf_codes)} 完了")
 
-        if (i + 1) % 10 == 0:
-            logger.info(f"  {i + 1}/{len(etf_codes)} 完了")
+    # 呼び出し側の順序に揃える
+    results = {code: results[code] for code in etf_codes if code in results}
+    failed = [code for code in etf_codes if code not in results]
 
     logger.info(
         f"一括ダウンロード完了: 成功 {len(results)}, 失敗 {len(failed)}"
@@ -447,36 +596,38 @@ def discover_etf_codes_from_jpx() -> list[str]:
     """
     JPXのPCFページからETFコード一覧をスクレイピングする。
     新規上場ETFの自動検出に使用。
+    一覧は1日の中では変わらないため、取得結果は日付単位でキャッシュする。
 
     Returns:
         ETFコードのリスト
     """
+    today = date.today()
+    cached = get_cached_etf_codes(today)
+    if cached:
+        return cached
+
     # JPXのインディカティブNAV・PCFページ
     url = "https://www.jpx.co.jp/equities/products/etfs/inav/index.html"
     logger.info(f"JPXからETFコード一覧を取得: {url}")
 
     try:
-        resp = requests.get(url, headers=HEADERS, timeout=REQUEST_TIMEOUT)
+        resp = _SESSION.get(url, headers=HEADERS, timeout=REQUEST_TIMEOUT)
         if resp.status_code != 200:
             logger.warning(f"JPXページ取得失敗: HTTP {resp.status_code}")
             return []
 
-        import re
-        # ICE PCFダウンロードリンクからETFコードを抽出
+        # ICE / Solactive の PCFダウンロードリンクからETFコードを抽出
         # パターン: inav.ice.com/pcf-download/XXXX.csv
-        ice_codes = re.findall(
-            r"inav\.ice\.com/pcf-download/(\w+)\.csv",
-            resp.text,
-        )
-        # Solactiveリンクからも抽出
-        sol_codes = re.findall(
-            r"solactive\.com/downloads/etfservices/tse-pcf/single/(\w+)\.csv",
-            resp.text,
-        )
-
-        all_codes = list(set(ice_codes + sol_codes))
+        #           solactive.com/downloads/etfservices/tse-pcf/single/XXXX.csv
+        # HTML全体を文字列にデコードせず、バイト列を1回だけ走査する
+        all_codes = sorted({
+            m.group(1).decode("ascii")
+            for m in _JPX_PCF_LINK_RE.finditer(resp.content)
+        })
         logger.info(f"JPXから {len(all_codes)} ETFコードを検出")
-        return sorted(all_codes)
+        if all_codes:
+            save_etf_codes(today, all_codes)
+        return all_codes
 
     except Exception as e:
         logger.error(f"JPXスクレイピングエラー: {e}")
@@ -7,12 +7,25 @@ yfinance では ^TPX が取得不可のため、Stooq を使用。
 from __future__ import annotations
 
 import logging
-from datetime import date, timedelta
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from pathlib import Path
 
 import pandas as pd
 
+from config import CACHE_DIR
+
 logger = logging.getLogger(__name__)
 
+# 取得結果のディスクキャッシュ
+_INDEX_CACHE_DIR = CACHE_DIR / "index_data"
+# 期間に当日以降を含む（終値が確定していない）場合のキャッシュ有効期間（秒）
+_INDEX_CACHE_TTL = 3600
+# 保存してからこの日数を過ぎたキャッシュファイルは削除する
+# (期間の終わりはサイドバーで日々動くため、期間ごとのファイルが溜まり続けないようにする)
+_INDEX_CACHE_KEEP_DAYS = 7
+
 # Stooq CSV API
 _STOOQ_URL = "https://stooq.com/q/d/l/?s={symbol}&d1={d1}&d2={d2}&i=d"
 _TOPIX_SYMBOL = "^tpx"
@@ -26,17 +39,63 @@ def _download_stooq(symbol: str, date_from: date, date_to: date) -> pd.DataFrame
     url = _STOOQ_URL.format(symbol=symbol, d1=d1, d2=d2)
 
     try:
-        df = pd.read_csv(url)
+        # 使うのは日付と終値だけなので、他の列 (Open/High/Low/Volume) は読まない
+        df = pd.read_csv(
+            url,
+            usecols=lambda c: c in ("Date", "Close"),
+            dtype={"Close": "float64"},
+        )
     except Exception as e:
         logger.warning(f"Stooq取得エラー ({symbol}): {e}")
         return pd.DataFrame()
 
-    if df.empty or "Close" not in df.columns:
+    if df.empty or "Close" not in df.columns or "Date" not in df.columns:
         logger.warning(f"{symbol}: データなし")
         return pd.DataFrame()
 
-    df["date"] = pd.to_datetime(df["Date"])
-    return df[["date", "Close"]].rename(columns={"Close": "value"})
+    return pd.DataFrame({
+        "date": pd.to_datetime(df["Date"]),
+        "value": df["Close"],
+    })
+
+
+def _index_cache_path(date_from: date, date_to: date) -> Path:
+    """指数データのキャッシュファイルパスを返す（ファイル名は取得期間）"""
+    return _INDEX_CACHE_DIR / f"{date_from:%Y%m%d}_{date_to:%Y%m%d}.parquet"
+
+
+def _prune_index_cache(keep: Path) -> None:
+    """_INDEX_CACHE_KEEP_DAYS 日より前に保存したキャッシュファイルを削除する"""
+    cutoff = time.time() - _INDEX_CACHE_KEEP_DAYS * 86400
+    for f in _INDEX_CACHE_DIR.glob("*.parquet"):
+        if f == keep:
+            continue
+        try:
+            if f.stat().st_mtime < cutoff:
+                f.unlink()
+        except OSError:
+            pass
+
+
+def _load_cached_index(date_from: date, date_to: date) -> pd.DataFrame | None:
+    """
+    有効な指数データのキャッシュがあれば返す。
+
+    期間の終わりより後の日に保存したキャッシュは終値が確定しているので常に有効、
+    それ以外は _INDEX_CACHE_TTL 秒以内に保存したものだけを有効とする。
+    """
+    path = _index_cache_path(date_from, date_to)
+    if not path.exists():
+        return None
+    mtime = path.stat().st_mtime
+    settled = datetime.fromtimestamp(mtime).date() > date_to
+    if not settled and time.time() - mtime > _INDEX_CACHE_TTL:
+        return None
+    try:
+        return pd.read_parquet(path, engine="pyarrow")
+    except Exception as e:
+        logger.warning(f"指数データキャッシュ読み込み失敗: {e}")
+        return None
 
 
 def fetch_index_data(
@@ -46,19 +105,47 @@ def fetch_index_data(
     """
     Stooqから日経平均とTOPIXの終値を取得する。
 
+    取得結果は期間ごとにディスクへキャッシュし、再起動後も再ダウンロードしない。
+
     Returns:
         DataFrame: date, 日経平均, TOPIX
     """
+    cached = _load_cached_index(date_from, date_to)
+    if cached is not None:
+        return cached
+
+    result = _download_index_data(date_from, date_to)
+
+    # 取得に失敗した系列がある場合はキャッシュしない
+    if {"日経平均", "TOPIX"}.issubset(result.columns):
+        try:
+            _INDEX_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            path = _index_cache_path(date_from, date_to)
+            result.to_parquet(path, index=False, engine="pyarrow")
+            _prune_index_cache(keep=path)
+        except Exception as e:
+            logger.warning(f"指数データキャッシュ保存失敗: {e}")
+
+    return result
+
+
+def _download_index_data(date_from: date, date_to: date) -> pd.DataFrame:
+    """日経平均とTOPIXの終値を Stooq からダウンロードして日付で結合する"""
     result = pd.DataFrame()
 
+    # 2指数のダウンロードは独立しているので同時に行う
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        nk_future = executor.submit(_download_stooq, _NK225_SYMBOL, date_from, date_to)
+        topix_future = executor.submit(_download_stooq, _TOPIX_SYMBOL, date_from, date_to)
+        nk = nk_future.result()
+        topix = topix_future.result()
+
     # 日経平均
-    nk = _download_stooq(_NK225_SYMBOL, date_from, date_to)
     if not nk.empty:
         nk = nk.rename(columns={"value": "日経平均"})
         result = nk
 
     # TOPIX（指数そのもの）
-    topix = _download_stooq(_TOPIX_SYMBOL, date_from, date_to)
     if not topix.empty:
         topix = topix.rename(columns={"value": "TOPIX"})
         if result.empty:
@@ -0,0 +1,85 @@
+"""
+PCFパース結果のローカルキャッシュ
+
+同じCSVを再パースしないよう、parse_pcf の結果 (PCFRecord) を
+CSVテキストの内容ハッシュをキーにしてディスクに保存する。
+--range で取得済みの期間を再実行した場合、パースを読み込みに置き換える。
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+import config
+import models
+from data import parser_futures, parser_pcf
+from data.cache import PARSE_CACHE_DIR
+from data.parser_pcf import parse_pcf
+from models import PCFRecord
+
+logger = logging.getLogger(__name__)
+
+
+def _parser_digest() -> str:
+    """
+    パース結果に影響するソースのハッシュ。
+
+    パーサーや config.py（先物の掛け目・ETFコード一覧）が変更されたら
+    古いキャッシュを使わないよう、キーに含める。
+    """
+    h = hashlib.blake2b(digest_size=8)
+    for module in (parser_pcf, parser_futures, models, config):
+        h.update(Path(module.__file__).read_bytes())
+    return h.hexdigest()
+
+
+_PARSER_DIGEST = _parser_digest()
+
+
+def _get_parse_cache_path(csv_text: str, etf_code: str, provider: str) -> Path:
+    """パース結果キャッシュのパスを生成"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(_PARSER_DIGEST.encode())
+    h.update(etf_code.encode())
+    h.update(b"\0")
+    h.update(csv_text.encode("utf-8", errors="surrogatepass"))
+    return PARSE_CACHE_DIR / provider / f"{h.hexdigest()}.pkl"
+
+
+def parse_pcf_cached(
+    csv_text: str,
+    etf_code: str,
+    provider: str = "ice",
+) -> Optional[PCFRecord]:
+    """
+    parse_pcf の結果をCSVの内容ごとにキャッシュする版。
+
+    パースに失敗した場合 (None) はキャッシュしない。
+    """
+    path = _get_parse_cache_path(csv_text, etf_code, provider)
+    if path.exists():
+        try:
+            return pickle.loads(path.read_bytes())
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError) as e:
+            logger.debug(f"パースキャッシュ読み込み失敗: {path}: {e}")
+
+    record = parse_pcf(csv_text, etf_code, provider=provider)
+    if record is None:
+        return None
+
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # 並列実行中の他スレッドと一時ファイルが衝突しないよう一意な名前にする
+        with tempfile.NamedTemporaryFile(
+            dir=path.parent, suffix=".tmp", delete=False
+        ) as f:
+            tmp_path = Path(f.name)
+            f.write(pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL))
+        tmp_path.replace(path)
+    except OSError as e:
+        logger.debug(f"パースキャッシュ保存失敗: {path}: {e}")
+    return record
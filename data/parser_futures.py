@@ -14,6 +14,7 @@ from __future__ import annotations
 
 import re
 import logging
+from functools import lru_cache
 from typing import Optional
 
 from config import FUTURES_MULTIPLIERS
@@ -29,6 +30,20 @@ MONTH_ABBR_TO_NUM = {
     "MAY": "05", "JUN": "06", "JUL": "07", "AUG": "08",
     "SEP": "09", "OCT": "10", "NOV": "11", "DEC": "12",
 }
+# 正規表現の一致文字列をそのまま引けるよう、小文字・先頭大文字の表記も含めた対応表
+# （それ以外の大小混在表記は .upper() して MONTH_ABBR_TO_NUM を引く）
+_MONTH_MAP = {
+    **MONTH_ABBR_TO_NUM,
+    **{k.lower(): v for k, v in MONTH_ABBR_TO_NUM.items()},
+    **{k.capitalize(): v for k, v in MONTH_ABBR_TO_NUM.items()},
+}
+
+
+def _month_num(abbr: str) -> str:
+    """英語月名の略称 (大小文字を問わない) を "01"〜"12" に変換"""
+    month = _MONTH_MAP.get(abbr)
+    return month if month is not None else MONTH_ABBR_TO_NUM[abbr.upper()]
+
 
 # ============================================================
 # 先物銘柄名の正規化ルール
@@ -82,6 +97,9 @@ FUTURES_PATTERNS: list[tuple[re.Pattern, str]] = [
     (re.compile(r"10\s*YEAR\s*JGB", re.IGNORECASE), "JGB10Y"),
 ]
 
+# 文字化けした先頭文字
+_GARBLED_CHARS_RE = re.compile(r"[・ｽ]+")
+
 # ============================================================
 # 限月抽出パターン
 # ============================================================
@@ -104,6 +122,9 @@ RE_CONTRACT_MMM_YY = re.compile(
 # \b では英字→数字の遷移を境界と認識しないため、(?<!\d)...(?!\d) を使用
 RE_CONTRACT_YYYYMM = re.compile(r"(?<!\d)(20\d{4})(?!\d)")
 
+# YYMM として妥当な4桁（年は20-35、月は01-12）
+_VALID_YYMM = frozenset(f"{yy:02d}{mm:02d}" for yy in range(20, 36) for mm in range(1, 13))
+
 # パターン5: オプション限月 - 例: ".FEB.2026."
 RE_OPTION_MONTH = re.compile(
     r"\.(JAN|FEB|MAR|APR|MAY|JUN|JUL|AUG|SEP|OCT|NOV|DEC)\.(\d{4})\.",
@@ -121,21 +142,21 @@ def _extract_contract_month(raw_name: str) -> Optional[str]:
     # オプション限月
     m = RE_OPTION_MONTH.search(raw_name)
     if m:
-        month_str = MONTH_ABBR_TO_NUM[m.group(1).upper()]
+        month_str = _month_num(m.group(1))
         year_str = m.group(2)[2:]  # "2026" -> "26"
         return year_str + month_str
 
     # MMM.YYYY / MMM YYYY
     m = RE_CONTRACT_MMM_YYYY.search(raw_name)
     if m:
-        month_str = MONTH_ABBR_TO_NUM[m.group(1).upper()]
+        month_str = _month_num(m.group(1))
         year_str = m.group(2)[2:]  # "2026" -> "26"
         return year_str + month_str
 
     # MMM YY
     m = RE_CONTRACT_MMM_YY.search(raw_name)
     if m:
-        month_str = MONTH_ABBR_TO_NUM[m.group(1).upper()]
+        month_str = _month_num(m.group(1))
         year_str = m.group(2)
         return year_str + month_str
 
@@ -146,12 +167,9 @@ def _extract_contract_month(raw_name: str) -> Optional[str]:
         return yyyymm[2:]  # "202603" -> "2603"
 
     # YYMM (4桁) - 最後にチェック（誤検出リスクがあるため）
-    # ただし、年は20-30の範囲、月は01-12の範囲に限定
-    candidates = RE_CONTRACT_YYMM.findall(raw_name)
-    for c in candidates:
-        yy = int(c[:2])
-        mm = int(c[2:])
-        if 20 <= yy <= 35 and 1 <= mm <= 12:
+    # ただし、年は20-35の範囲、月は01-12の範囲に限定
+    for c in RE_CONTRACT_YYMM.findall(raw_name):
+        if c in _VALID_YYMM:
             return c
 
     return None
@@ -166,8 +184,14 @@ def _classify_futures_type(raw_name: str) -> str:
         マッチしない場合は "UNKNOWN"。
     """
     # 文字化け対応: 先頭の化け文字を除去
-    cleaned = re.sub(r"[・ｽ]+", "", raw_name).strip()
-
+    # （化け文字を含む名前は少ないので、含まれる場合だけ置換する）
+    cleaned = raw_name
+    if "・" in cleaned or "ｽ" in cleaned:
+        cleaned = _GARBLED_CHARS_RE.sub("", cleaned)
+    cleaned = cleaned.strip()
+
+    # 各パターンを順に検索する（1つの選択パターンにまとめると、順序優先を保つための
+    # 先読みでリテラル検索の最適化が効かなくなり、かえって遅い）
     for pattern, futures_type in FUTURES_PATTERNS:
         if pattern.search(cleaned):
             return futures_type
@@ -176,6 +200,23 @@ def _classify_futures_type(raw_name: str) -> str:
     return "UNKNOWN"
 
 
+@lru_cache(maxsize=None)
+def _parse_futures_name(raw_name: str) -> tuple[str, str, Optional[str], int]:
+    """
+    生の銘柄名から (前後の空白を除いた銘柄名, 種別, 限月, 乗数) を求める。
+
+    同じ銘柄名は全ETF・全日付で繰り返し現れるため、正規表現による判定は
+    銘柄名ごとに1回だけ行い、結果を使い回す（2回目以降は辞書引き1回）。
+    銘柄名の種類は限月の数程度に限られるので、上限なしのキャッシュにして
+    LRU の管理コストも省く。
+    """
+    name = raw_name.strip()
+    futures_type = _classify_futures_type(name)
+    contract_month = _extract_contract_month(name)
+    multiplier = FUTURES_MULTIPLIERS.get(futures_type, 1)
+    return name, futures_type, contract_month, multiplier
+
+
 def normalize_futures(
     raw_name: str,
     quantity: int = 0,
@@ -202,10 +243,7 @@ def normalize_futures(
             multiplier=1,
         )
 
-    raw_name = raw_name.strip()
-    futures_type = _classify_futures_type(raw_name)
-    contract_month = _extract_contract_month(raw_name)
-    multiplier = FUTURES_MULTIPLIERS.get(futures_type, 1)
+    raw_name, futures_type, contract_month, multiplier = _parse_futures_name(raw_name)
 
     return FuturesPosition(
         raw_name=raw_name,
@@ -10,77 +10,82 @@ import csv
 import io
 import logging
 from datetime import date, datetime
+from functools import lru_cache
+from itertools import islice
 from typing import Optional
 
+import numpy as np
+import pandas as pd
+
+from data.parser_pcf import (
+    _EXCHANGES,
+    _FUTURES_CODE_RE,
+    _FUTURES_NAME_RE,
+    _column_positions,
+    _ymd_digits,
+)
+
 logger = logging.getLogger(__name__)
 
+# パーサーが返す DataFrame の列
+HOLDINGS_COLUMNS = [
+    "etf_code", "date", "stock_code", "stock_name", "shares", "price", "market_value",
+]
+
 
 def parse_holdings_ice(
     csv_text: str,
     etf_code: str,
-) -> list[dict]:
+) -> pd.DataFrame:
     """
     ICE形式のCSVから個別株式の保有情報を抽出する。
 
     Returns:
-        list of dict: [{
+        DataFrame (1行 = 1銘柄): [
             "etf_code": str,
-            "date": date,
+            "date": datetime64,
             "stock_code": str,   # 証券コード
             "stock_name": str,   # 銘柄名
-            "shares": int,       # 保有株数
-            "price": float,      # 株価
-            "market_value": float,  # 時価 (shares × price)
-        }, ...]
+            "shares": int64,     # 保有株数
+            "price": float64,    # 株価
+            "market_value": float64,  # 時価 (shares × price)
+        ]
     """
     if not csv_text or not csv_text.strip():
-        return []
+        return _empty_holdings()
 
-    lines = csv_text.strip().split("\n")
-    if len(lines) < 4:
-        return []
+    # 先頭4行 (ヘッダー・メタデータ・カラムヘッダー) だけ先に読み、
+    # 行4以降の保有銘柄は同じ reader から1行ずつ処理する
+    reader = csv.reader(io.StringIO(csv_text.lstrip()))
+    head = list(islice(reader, 4))
+    if len(head) < 4:
+        return _empty_holdings()
 
     # --- 行1: メタデータ値 ---
-    meta_reader = csv.reader(io.StringIO(lines[1]))
-    meta_row = next(meta_reader, [])
+    meta_row = head[1]
     if len(meta_row) < 5:
-        return []
+        return _empty_holdings()
 
     pcf_date = _parse_date(meta_row[4])
     if pcf_date is None:
         pcf_date = date.today()
 
     # --- 行3: カラムヘッダー ---
-    col_header_reader = csv.reader(io.StringIO(lines[3]))
-    col_headers = next(col_header_reader, [])
-    col_headers_lower = [h.strip().lower() for h in col_headers]
-
-    shares_col = -1
-    price_col = -1
-    for idx, h in enumerate(col_headers_lower):
-        if h in ("shares amount", "shares"):
-            shares_col = idx
-        elif h == "stock price":
-            price_col = idx
-
-    if shares_col < 0:
-        shares_col = 5
-    if price_col < 0:
-        price_col = shares_col + 1
+    shares_col, price_col, _, _ = _column_positions(tuple(head[3]))
 
     # --- 行4以降: 保有銘柄 ---
     holdings = []
-    reader = csv.reader(io.StringIO("\n".join(lines[4:])))
     for row in reader:
         if len(row) < 3:
             continue
 
+        code_val = row[0].strip()
+        name = row[1].strip()
+
         # 先物行をスキップ
-        if _is_futures_row(row):
+        if _is_futures_row(row, code_val, name):
             continue
 
-        code_val = row[0].strip() if row[0] else ""
-        name = row[1].strip() if len(row) > 1 else ""
         shares = _parse_int(row[shares_col]) if len(row) > shares_col else 0
         price = _parse_number(row[price_col]) if len(row) > price_col else None
 
@@ -89,84 +94,58 @@ def parse_holdings_ice(
         if not code_val and not name:
             continue
 
-        holdings.append({
-            "etf_code": etf_code,
-            "date": pcf_date,
-            "stock_code": code_val,
-            "stock_name": name,
-            "shares": shares,
-            "price": price,
-            "market_value": shares * price,
-        })
+        holdings.append((code_val, name, shares, price, shares * price))
 
-    return holdings
+    return _holdings_frame(etf_code, pcf_date, holdings)
 
 
 def parse_holdings_spglobal(
     csv_text: str,
     etf_code: str,
-) -> list[dict]:
+) -> pd.DataFrame:
     """
     S&P Global形式のCSVから個別株式の保有情報を抽出する。
     """
     if not csv_text or not csv_text.strip():
-        return []
+        return _empty_holdings()
 
-    lines = csv_text.strip().split("\n")
-    if len(lines) < 4:
-        return []
+    # 先頭4行 (ヘッダー・メタデータ・カラムヘッダー) だけ先に読み、
+    # 行4以降の保有銘柄は同じ reader から1行ずつ処理する
+    reader = csv.reader(io.StringIO(csv_text.lstrip()))
+    head = list(islice(reader, 4))
+    if len(head) < 4:
+        return _empty_holdings()
 
     # フォーマット判定
-    header_line = lines[0].strip()
-    is_amova = "Cash & Others" in header_line or "AUM" in header_line
+    is_amova = any("Cash & Others" in h or "AUM" in h for h in head[0])
 
     # --- 行1: メタデータ ---
-    meta_reader = csv.reader(io.StringIO(lines[1]))
-    meta_row = next(meta_reader, [])
+    meta_row = head[1]
     if len(meta_row) < 5:
-        return []
+        return _empty_holdings()
 
     pcf_date = _parse_date(meta_row[4])
     if pcf_date is None:
         pcf_date = date.today()
 
     # --- 行3: カラムヘッダー ---
-    col_header_reader = csv.reader(io.StringIO(lines[3]))
-    col_headers = next(col_header_reader, [])
-    col_headers_lower = [h.strip().lower() for h in col_headers]
-
-    shares_col = -1
-    price_col = -1
-    mv_col = -1
-    for idx, h in enumerate(col_headers_lower):
-        if h in ("shares amount", "shares"):
-            shares_col = idx
-        elif h == "stock price":
-            price_col = idx
-        elif h == "market value":
-            mv_col = idx
-
-    if shares_col < 0:
-        shares_col = 5
-    if price_col < 0:
-        price_col = shares_col + 1
+    shares_col, price_col, mv_col, _ = _column_positions(tuple(head[3]))
 
     # --- 行4以降: 保有銘柄 ---
     holdings = []
-    reader = csv.reader(io.StringIO("\n".join(lines[4:])))
     for row in reader:
         if len(row) < 3:
             continue
 
-        code_val = row[0].strip() if row[0] else ""
-        name = row[1].strip() if len(row) > 1 else ""
+        code_val = row[0].strip()
+        name = row[1].strip()
 
         # Cash / Margin行をスキップ（アモーヴァ形式）
         if code_val.lower() in ("cash", "margin"):
             continue
 
         # 先物行をスキップ
-        if _is_futures_row(row):
+        if _is_futures_row(row, code_val, name):
             continue
 
         shares = _parse_int(row[shares_col]) if len(row) > shares_col else 0
@@ -183,24 +162,16 @@ def parse_holdings_spglobal(
         else:
             market_val = shares * price
 
-        holdings.append({
-            "etf_code": etf_code,
-            "date": pcf_date,
-            "stock_code": code_val,
-            "stock_name": name,
-            "shares": shares,
-            "price": price,
-            "market_value": market_val,
-        })
+        holdings.append((code_val, name, shares, price, market_val))
 
-    return holdings
+    return _holdings_frame(etf_code, pcf_date, holdings)
 
 
 def parse_holdings(
     csv_text: str,
     etf_code: str,
     provider: str = "ice",
-) -> list[dict]:
+) -> pd.DataFrame:
     """プロバイダに応じたホールディングスパーサー"""
     try:
         if provider == "ice":
@@ -208,19 +179,53 @@ def parse_holdings(
         elif provider == "spglobal":
             return parse_holdings_spglobal(csv_text, etf_code)
         else:
-            return []
+            return _empty_holdings()
     except Exception as e:
         logger.error(f"Holdings parse error ({provider}, {etf_code}): {e}")
-        return []
+        return _empty_holdings()
+
+
+def _empty_holdings() -> pd.DataFrame:
+    """保有銘柄なしの DataFrame"""
+    return pd.DataFrame(columns=HOLDINGS_COLUMNS)
+
+
+def _holdings_frame(
+    etf_code: str, pcf_date: date, holdings: list[tuple],
+) -> pd.DataFrame:
+    """
+    (証券コード, 銘柄名, 株数, 株価, 時価) のタプル列から DataFrame を作る。
+
+    行ごとに dict を作らず、列ごとに型付きの配列へまとめる。
+    """
+    if not holdings:
+        return _empty_holdings()
+    codes, names, shares, prices, market_values = zip(*holdings)
+    return pd.DataFrame({
+        "etf_code": etf_code,
+        "date": pd.Timestamp(pcf_date),
+        "stock_code": list(codes),
+        "stock_name": list(names),
+        "shares": np.array(shares, dtype=np.int64),
+        "price": np.array(prices, dtype=np.float64),
+        "market_value": np.array(market_values, dtype=np.float64),
+    }, columns=HOLDINGS_COLUMNS)
 
 
 # ============================================================
 # ヘルパー関数（parser_pcf.py と共通）
 # ============================================================
+@lru_cache(maxsize=1024)
 def _parse_date(s: str) -> Optional[date]:
     if not s:
         return None
     s = s.strip().strip('"')
+    digits = _ymd_digits(s)
+    if digits is not None:
+        try:
+            return date(int(digits[:4]), int(digits[4:6]), int(digits[6:]))
+        except ValueError:
+            return None
     for fmt in ["%Y-%m-%d", "%Y/%m/%d", "%d/%m/%Y", "%m/%d/%Y", "%Y%m%d", "%d-%b-%Y"]:
         try:
             return datetime.strptime(s, fmt).date()
@@ -246,39 +251,31 @@ def _parse_int(s) -> Optional[int]:
     return int(f) if f is not None else None
 
 
-def _is_futures_row(row: list[str]) -> bool:
-    """先物行かどうか判定（parser_pcf.pyと同一ロジック）"""
-    import re
+def _is_futures_row(row: list[str], code: str, name: str) -> bool:
+    """
+    先物行かどうか判定（parser_pcf.pyと同一ロジック）
+
+    code / name は呼び出し側で前後の空白を除いた Code列・Name列。
+    """
     if len(row) < 3:
         return False
 
-    code = row[0].strip() if row[0] else ""
-    name = (row[1].strip() if len(row) > 1 else "").upper()
-
     exchange = ""
     for idx in [3, 4]:
         if len(row) > idx and row[idx]:
             val = row[idx].strip().upper()
-            if val in ("OSE", "XOSE", "TSE", "XTKS", "SAP", "OTC", "HKF", "TOCOM",
-                       "XNYS", "XNAS"):
+            if val in _EXCHANGES:
                 exchange = val
                 break
 
     if exchange in ("OSE", "XOSE"):
         if not code:
             return True
-        if re.match(r"^[A-Z]{2,4}[A-Z0-9]\d$", code):
+        if _FUTURES_CODE_RE.match(code):
             return True
 
     if not code and name:
-        futures_name_patterns = [
-            r"FUTURES", r"FUTR",
-            r"TOPIX\s+\d{4}", r"NK225\s+\d{4}",
-            r"NIKKEI\s*225?\s+\d", r"TOPIX\s+INDX",
-            r"NIKKEI\s+225\s+MINI", r"JGB", r"先物",
-        ]
-        for pat in futures_name_patterns:
-            if re.search(pat, name):
-                return True
+        if _FUTURES_NAME_RE.search(name.upper()):
+            return True
 
     return False
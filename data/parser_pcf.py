@@ -11,6 +11,8 @@ import io
 import re
 import logging
 from datetime import date, datetime
+from functools import lru_cache
+from itertools import islice
 from typing import Optional
 
 from models import PCFRecord, FuturesPosition
@@ -18,6 +20,25 @@ from data.parser_futures import normalize_futures
 
 logger = logging.getLogger(__name__)
 
+# 先物判定に使う取引所コード
+_EXCHANGES = frozenset((
+    "OSE", "XOSE", "TSE", "XTKS", "SAP", "OTC", "HKF", "TOCOM", "XNYS", "XNAS",
+))
+# アモーヴァ形式の先物コード (TPH6, NKH6, NOH6 等 - 2-4文字+1-2数字)
+_FUTURES_CODE_RE = re.compile(r"^[A-Z]{2,4}[A-Z0-9]\d$")
+# Code列が空の行の先物銘柄名パターン（大文字化した銘柄名に対して検索）
+_FUTURES_NAME_RE = re.compile(
+    r"FUTURES"
+    r"|FUTR"
+    r"|TOPIX\s+\d{4}"        # "TOPIX 2603"
+    r"|NK225\s+\d{4}"        # "NK225 2603"
+    r"|NIKKEI\s*225?\s+\d"   # "NIKKEI 225 2603"
+    r"|TOPIX\s+INDX"         # "TOPIX INDX FUTR"
+    r"|NIKKEI\s+225\s+MINI"  # "NIKKEI 225 MINI 2603"
+    r"|JGB"
+    r"|先物"
+)
+
 
 # ============================================================
 # ICE Data Services パーサー
@@ -36,13 +57,15 @@ def parse_ice_pcf(csv_text: str, etf_code: str) -> Optional[PCFRecord]:
     if not csv_text or not csv_text.strip():
         return None
 
-    lines = csv_text.strip().split("\n")
-    if len(lines) < 4:
+    # 先頭4行 (ヘッダー・メタデータ・カラムヘッダー) だけ先に読み、
+    # 行4以降の保有銘柄は同じ reader から1行ずつ処理する
+    reader = csv.reader(io.StringIO(csv_text.lstrip()))
+    head = list(islice(reader, 4))
+    if len(head) < 4:
         return None
 
     # --- 行1: メタデータ値 ---
-    meta_reader = csv.reader(io.StringIO(lines[1]))
-    meta_row = next(meta_reader, [])
+    meta_row = head[1]
 
     if len(meta_row) < 5:
         logger.warning(f"ICE メタデータ不足: {etf_code}")
@@ -55,37 +78,21 @@ def parse_ice_pcf(csv_text: str, etf_code: str) -> Optional[PCFRecord]:
         pcf_date = date.today()
 
     # --- 行3: カラムヘッダー ---
-    col_header_reader = csv.reader(io.StringIO(lines[3]))
-    col_headers = next(col_header_reader, [])
-    col_headers_lower = [h.strip().lower() for h in col_headers]
-
-    # カラム位置を特定
-    shares_col = -1
-    price_col = -1
-    for idx, h in enumerate(col_headers_lower):
-        if h in ("shares amount", "shares"):
-            shares_col = idx
-        elif h == "stock price":
-            price_col = idx
-
-    if shares_col < 0:
-        shares_col = 5
-    if price_col < 0:
-        price_col = shares_col + 1
+    shares_col, price_col, _, _ = _column_positions(tuple(head[3]))
 
     # --- 行4以降: 保有銘柄 ---
     futures_positions = []
     total_equity_value = 0.0
     total_equity_count = 0
 
-    reader = csv.reader(io.StringIO("\n".join(lines[4:])))
     for row in reader:
         if len(row) < 3:
             continue
 
-        name = row[1].strip() if len(row) > 1 else ""
+        code_val = row[0].strip()
+        name = row[1].strip()
 
-        if _is_futures_row(row):
+        if _is_futures_row(row, code_val, name):
             quantity = _parse_int(row[shares_col]) if len(row) > shares_col else 0
             price = _parse_number(row[price_col]) if len(row) > price_col else 0.0
             market_val = (quantity or 0) * (price or 0)
@@ -134,6 +141,37 @@ def parse_ice_pcf(csv_text: str, etf_code: str) -> Optional[PCFRecord]:
 # ============================================================
 # Solactive AG パーサー
 # ============================================================
+# メタデータセクションの既知のキー (小文字) → meta のフィールド
+_SOLACTIVE_META_FIELDS = {
+    "code": "code",
+    "fund code": "code",
+    "etf code": "code",
+    "cash": "cash",
+    "cash component": "cash",
+    "fund cash component": "cash",
+    "shares outstanding": "shares_outstanding",
+    "units": "shares_outstanding",
+    "date": "date",
+    "fund date": "date",
+    "nav": "nav",
+}
+
+
+def _match_solactive_meta_field(key: str, has_code: bool) -> Optional[str]:
+    """未知のキーを部分一致でメタデータのフィールドに振り分ける"""
+    if "code" in key and not has_code:
+        return "code"
+    elif "cash" in key:
+        return "cash"
+    elif "shares outstanding" in key or "units" in key:
+        return "shares_outstanding"
+    elif "date" in key:
+        return "date"
+    elif "nav" in key:
+        return "nav"
+    return None
+
+
 def parse_solactive_pcf(csv_text: str, etf_code: str) -> Optional[PCFRecord]:
     """
     Solactive AG形式のPCF CSVをパースする。
@@ -145,42 +183,33 @@ def parse_solactive_pcf(csv_text: str, etf_code: str) -> Optional[PCFRecord]:
     if not csv_text or not csv_text.strip():
         return None
 
-    lines = csv_text.strip().split("\n")
+    # メタデータ・保有銘柄とも同じ csv.reader で読む（引用符内のカンマも正しく分割される）
+    reader = csv.reader(io.StringIO(csv_text.strip()))
 
     # メタデータ抽出
     meta = {}
-    holdings_start = -1
+    has_holdings = False
     section = 0
 
-    for i, line in enumerate(lines):
-        line_stripped = line.strip()
-        if not line_stripped:
+    for row in reader:
+        parts = [p.strip() for p in row]
+        if not any(parts):
             section += 1
             continue
 
-        parts = [p.strip().strip('"') for p in line_stripped.split(",")]
-
         if section == 0:
             # メタデータセクション
             if len(parts) >= 2:
                 key = parts[0].lower()
-                val = parts[1]
-                if "code" in key and "code" not in meta:
-                    meta["code"] = val
-                elif "cash" in key:
-                    meta["cash"] = val
-                elif "shares outstanding" in key or "units" in key:
-                    meta["shares_outstanding"] = val
-                elif "date" in key:
-                    meta["date"] = val
-                elif "nav" in key:
-                    meta["nav"] = val
+                field = _SOLACTIVE_META_FIELDS.get(key)
+                if field is None:
+                    field = _match_solactive_meta_field(key, "code" in meta)
+                # ETFコードは最初に現れた値を使う
+                if field and not (field == "code" and "code" in meta):
+                    meta[field] = parts[1]
         else:
-            # 保有銘柄ヘッダーの検出
-            if holdings_start < 0:
-                if any("code" in p.lower() for p in parts):
-                    holdings_start = i + 1
-                    continue
+            # 保有銘柄ヘッダーの検出（以降の行は同じ reader から保有銘柄として読む）
+            has_holdings = any("code" in p.lower() for p in parts)
             break
 
     pcf_date = _parse_date(meta.get("date", ""))
@@ -196,17 +225,17 @@ def parse_solactive_pcf(csv_text: str, etf_code: str) -> Optional[PCFRecord]:
     total_equity_value = 0.0
     total_equity_count = 0
 
-    if holdings_start > 0:
-        reader = csv.reader(io.StringIO("\n".join(lines[holdings_start:])))
+    if has_holdings:
         for row in reader:
             if len(row) < 6:
                 continue
 
-            name = row[1].strip() if len(row) > 1 else ""
+            code_val = row[0].strip()
+            name = row[1].strip()
             shares_amount = _parse_int(row[5]) if len(row) > 5 else 0
             stock_price = _parse_number(row[6]) if len(row) > 6 else None
 
-            if _is_futures_row(row):
+            if _is_futures_row(row, code_val, name):
                 fp = normalize_futures(
                     name,
                     shares_amount or 0,
@@ -251,18 +280,19 @@ def parse_spglobal_pcf(csv_text: str, etf_code: str) -> Optional[PCFRecord]:
     if not csv_text or not csv_text.strip():
         return None
 
-    lines = csv_text.strip().split("\n")
-    if len(lines) < 4:
+    # 先頭4行 (ヘッダー・メタデータ・カラムヘッダー) だけ先に読み、
+    # 行4以降の保有銘柄は同じ reader から1行ずつ処理する
+    reader = csv.reader(io.StringIO(csv_text.lstrip()))
+    head = list(islice(reader, 4))
+    if len(head) < 4:
         return None
 
     # フォーマット判定: 行0のヘッダーで区別
-    header_line = lines[0].strip()
-    is_amova = "Cash & Others" in header_line or "AUM" in header_line
+    is_amova = any("Cash & Others" in h or "AUM" in h for h in head[0])
 
     # --- 行0: ヘッダー名 ---
     # --- 行1: メタデータ値 ---
-    meta_reader = csv.reader(io.StringIO(lines[1]))
-    meta_row = next(meta_reader, [])
+    meta_row = head[1]
 
     if len(meta_row) < 5:
         logger.warning(f"S&P Global メタデータ不足: {etf_code}")
@@ -280,50 +310,26 @@ def parse_spglobal_pcf(csv_text: str, etf_code: str) -> Optional[PCFRecord]:
         nav = _parse_number(meta_row[5])
 
     # --- 行3: カラムヘッダー ---
-    col_header_reader = csv.reader(io.StringIO(lines[3]))
-    col_headers = next(col_header_reader, [])
-    col_headers_lower = [h.strip().lower() for h in col_headers]
-
-    # カラム位置を特定
-    shares_col = -1
-    price_col = -1
-    mv_col = -1
-    multiplier_col = -1
-    for idx, h in enumerate(col_headers_lower):
-        if h in ("shares amount", "shares"):
-            shares_col = idx
-        elif h == "stock price":
-            price_col = idx
-        elif h == "market value":
-            mv_col = idx
-        elif h == "future multiplier":
-            multiplier_col = idx
-
-    if shares_col < 0:
-        # フォールバック: 5列目or6列目
-        shares_col = 5
-    if price_col < 0:
-        price_col = shares_col + 1
+    shares_col, price_col, mv_col, multiplier_col = _column_positions(tuple(head[3]))
 
     # --- 行4以降: 保有銘柄 ---
     futures_positions = []
     total_equity_value = 0.0
     total_equity_count = 0
 
-    reader = csv.reader(io.StringIO("\n".join(lines[4:])))
     for row in reader:
         if len(row) < 3:
             continue
 
-        code_val = row[0].strip() if row[0] else ""
-        name = row[1].strip() if len(row) > 1 else ""
+        code_val = row[0].strip()
+        name = row[1].strip()
 
         # Cash / Margin 行をスキップ (アモーヴァ形式)
         if code_val.lower() in ("cash", "margin"):
             continue
 
         # 先物判定
-        if _is_futures_row(row):
+        if _is_futures_row(row, code_val, name):
             quantity = _parse_int(row[shares_col]) if len(row) > shares_col else 0
             price = _parse_number(row[price_col]) if len(row) > price_col else 0.0
 
@@ -376,6 +382,14 @@ def parse_spglobal_pcf(csv_text: str, etf_code: str) -> Optional[PCFRecord]:
 # ============================================================
 # 統合パーサー
 # ============================================================
+# parse_pcf で使うパーサー（プロバイダ名 → 関数）
+_PARSERS = {
+    "ice": parse_ice_pcf,
+    "solactive": parse_solactive_pcf,
+    "spglobal": parse_spglobal_pcf,
+}
+
+
 def parse_pcf(
     csv_text: str,
     etf_code: str,
@@ -392,16 +406,12 @@ def parse_pcf(
     Returns:
         PCFRecord。パース失敗時はNone。
     """
+    parser = _PARSERS.get(provider)
+    if parser is None:
+        logger.warning(f"未対応プロバイダ: {provider}")
+        return None
     try:
-        if provider == "ice":
-            return parse_ice_pcf(csv_text, etf_code)
-        elif provider == "solactive":
-            return parse_solactive_pcf(csv_text, etf_code)
-        elif provider == "spglobal":
-            return parse_spglobal_pcf(csv_text, etf_code)
-        else:
-            logger.warning(f"未対応プロバイダ: {provider}")
-            return None
+        return parser(csv_text, etf_code)
     except Exception as e:
         logger.error(f"PCFパースエラー ({provider}, {etf_code}): {e}")
         return None
@@ -410,13 +420,27 @@ def parse_pcf(
 # ============================================================
 # ヘルパー関数
 # ============================================================
+@lru_cache(maxsize=1024)
 def _parse_date(s: str) -> Optional[date]:
-    """日付文字列をパース"""
+    """
+    日付文字列をパース
+
+    同じ日付文字列は多数のETFで繰り返し現れるためキャッシュする。
+    """
     if not s:
         return None
 
     s = s.strip().strip('"')
 
+    # PCFで多い "20260217" / "2026-02-17" / "2026/02/17" 形式は
+    # strptime を使わず直接変換する
+    digits = _ymd_digits(s)
+    if digits is not None:
+        try:
+            return date(int(digits[:4]), int(digits[4:6]), int(digits[6:]))
+        except ValueError:
+            return None
+
     formats = [
         "%Y-%m-%d",
         "%Y/%m/%d",
@@ -433,6 +457,48 @@ def _parse_date(s: str) -> Optional[date]:
     return None
 
 
+@lru_cache(maxsize=None)
+def _column_positions(headers: tuple[str, ...]) -> tuple[int, int, int, int]:
+    """
+    カラムヘッダー行から (株数, 株価, 時価, 先物掛け目) の列位置を求める。
+
+    ヘッダーはプロバイダ・形式ごとにほぼ固定なので、ヘッダー行ごとに結果をキャッシュする。
+    時価・先物掛け目の列がなければ -1。
+    """
+    shares_col = -1
+    price_col = -1
+    mv_col = -1
+    multiplier_col = -1
+    for idx, h in enumerate(col.strip().lower() for col in headers):
+        if h in ("shares amount", "shares"):
+            shares_col = idx
+        elif h == "stock price":
+            price_col = idx
+        elif h == "market value":
+            mv_col = idx
+        elif h == "future multiplier":
+            multiplier_col = idx
+
+    if shares_col < 0:
+        # フォールバック: 5列目or6列目
+        shares_col = 5
+    if price_col < 0:
+        price_col = shares_col + 1
+    return shares_col, price_col, mv_col, multiplier_col
+
+
+def _ymd_digits(s: str) -> Optional[str]:
+    """
+    "YYYYMMDD" / "YYYY-MM-DD" / "YYYY/MM/DD" 形式なら8桁の数字列を返す。
+    それ以外の形式は None。
+    """
+    if len(s) == 10 and s[4] in "-/" and s[7] == s[4]:
+        s = s[:4] + s[5:7] + s[8:]
+    if len(s) == 8 and s.isascii() and s.isdigit():
+        return s
+    return None
+
+
 def _parse_number(s: str | None) -> Optional[float]:
     """数値文字列をfloatに変換"""
     if s is None:
@@ -454,7 +520,7 @@ def _parse_int(s: str | None) -> Optional[int]:
     return None
 
 
-def _is_futures_row(row: list[str]) -> bool:
+def _is_futures_row(row: list[str], code: str, name: str) -> bool:
     """
     CSVの行が先物データかどうかを判定する。
 
@@ -463,20 +529,21 @@ def _is_futures_row(row: list[str]) -> bool:
       - Code列が空（ICE/大和形式）かつ Name列に先物キーワード+限月を含む
       - Code列が先物コード（TPH6, NKH6 等 - アモーヴァ形式）
       - 銘柄名に "FUTURES" "FUTR" + 限月表記を含む
+
+    Args:
+        row: CSVの行
+        code: 前後の空白を除いた Code列 (呼び出し側で計算済みのものを渡す)
+        name: 前後の空白を除いた Name列 (同上)
     """
     if len(row) < 3:
         return False
 
-    code = row[0].strip() if row[0] else ""
-    name = (row[1].strip() if len(row) > 1 else "").upper()
-
     # Exchange列の位置を推定 (3番目 or 4番目)
     exchange = ""
     for idx in [3, 4]:
         if len(row) > idx and row[idx]:
             val = row[idx].strip().upper()
-            if val in ("OSE", "XOSE", "TSE", "XTKS", "SAP", "OTC", "HKF", "TOCOM",
-                       "XNYS", "XNAS"):
+            if val in _EXCHANGES:
                 exchange = val
                 break
 
@@ -486,25 +553,23 @@ def _is_futures_row(row: list[str]) -> bool:
         # Code列が空、または先物コードパターンならば先物
         if not code:
             return True
-        # アモーヴァ形式の先物コード (TPH6, NKH6, NOH6 等 - 2-4文字+1-2数字)
-        if re.match(r"^[A-Z]{2,4}[A-Z0-9]\d$", code):
+        # アモーヴァ形式の先物コード
+        if _FUTURES_CODE_RE.match(code):
             return True
 
     # Code列が空で Name列に先物キーワードを含む
     if not code and name:
-        futures_name_patterns = [
-            r"FUTURES",
-            r"FUTR",
-            r"TOPIX\s+\d{4}",       # "TOPIX 2603"
-            r"NK225\s+\d{4}",       # "NK225 2603"
-            r"NIKKEI\s*225?\s+\d",  # "NIKKEI 225 2603"
-            r"TOPIX\s+INDX",        # "TOPIX INDX FUTR"
-            r"NIKKEI\s+225\s+MINI", # "NIKKEI 225 MINI 2603"
-            r"JGB",
-            r"先物",
-        ]
-        for pat in futures_name_patterns:
-            if re.search(pat, name):
-                return True
+        return _is_futures_name(name.upper())
 
     return False
+
+
+@lru_cache(maxsize=None)
+def _is_futures_name(name: str) -> bool:
+    """
+    大文字化した銘柄名が先物のキーワードを含むか判定する。
+
+    同じ先物銘柄名は日付・ETFをまたいで繰り返し現れるため、
+    銘柄名ごとに結果をキャッシュしてパターン照合を1回に抑える。
+    """
+    return _FUTURES_NAME_RE.search(name) is not None
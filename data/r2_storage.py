@@ -6,6 +6,7 @@ Fails silently on any error so the app can fall back to local storage.
 from __future__ import annotations
 
 import logging
+from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
@@ -83,6 +84,22 @@ def r2_put(key: str, content: bytes) -> bool:
         return False
 
 
+def r2_put_file(key: str, path: Path) -> bool:
+    """Upload a local file to R2 without reading it into memory.
+
+    boto3 streams the file (multipart for large files). Returns True on success.
+    """
+    _init_client()
+    if _client is None:
+        return False
+    try:
+        _client.upload_file(str(path), _bucket, key)
+        return True
+    except Exception as e:
+        logger.warning("R2 upload failed for %s: %s", key, e)
+        return False
+
+
 def r2_available() -> bool:
     """Check if R2 is configured and available."""
     _init_client()
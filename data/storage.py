@@ -24,6 +24,34 @@ R2_TIMESERIES_KEY = "pcf/etf_timeseries.parquet"
 R2_MASTER_KEY = "pcf/etf_master.csv"
 R2_HOLDINGS_KEY = "pcf/holdings.parquet"
 
+# 読み込み時に float32 へ縮小する列
+_FLOAT32_COLUMNS = [
+    "futures1_quantity", "futures1_multiplier",
+    "futures2_quantity", "futures2_multiplier",
+]
+
+# Parquet 書き出し設定
+# zstd は snappy より小さく、展開速度はほぼ同じ。行グループは書き出し時の
+# メモリ使用量を抑えるための大きさに区切る。
+_PARQUET_WRITE_OPTIONS = dict(
+    engine="pyarrow",
+    index=False,
+    compression="zstd",
+    compression_level=3,
+    row_group_size=50_000,
+)
+
+
+def _as_datetime(values: pd.Series) -> pd.Series:
+    """
+    日付列を datetime64 にする。
+
+    Parquet に datetime64 のまま保存した列は変換済みなので、コピーせずそのまま返す。
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    return pd.to_datetime(values)
+
 
 def ensure_store_dir():
     """ストアディレクトリを作成"""
@@ -39,7 +67,7 @@ def save_timeseries(df: pd.DataFrame, path: Path = ETF_TIMESERIES_PATH) -> None:
 
     # Parquetバイト列を生成
     buf = io.BytesIO()
-    df.to_parquet(buf, index=False, engine="pyarrow")
+    df.to_parquet(buf, **_PARQUET_WRITE_OPTIONS)
     parquet_bytes = buf.getvalue()
 
     # ローカル保存
@@ -88,7 +116,7 @@ def load_timeseries(
 
     # フィルタ適用
     if "date" in df.columns:
-        df["date"] = pd.to_datetime(df["date"])
+        df["date"] = _as_datetime(df["date"])
 
     if etf_codes is not None:
         df = df[df["etf_code"].isin(etf_codes)]
@@ -99,7 +127,23 @@ def load_timeseries(
     if date_to is not None:
         df = df[df["date"] <= pd.Timestamp(date_to)]
 
-    return df.reset_index(drop=True)
+    # 日付順に並べておく（ダッシュボードの期間フィルタは二分探索で切り出す）
+    if "date" in df.columns:
+        df = df.sort_values("date", kind="stable")
+
+    df = df.reset_index(drop=True)
+
+    # etf_code はカテゴリ型にして isin / groupby を整数コード上で行う
+    if "etf_code" in df.columns:
+        df["etf_code"] = df["etf_code"].astype("category")
+
+    # 先物の枚数・掛け目は float32 で正確に表せる範囲なので縮小する
+    # (NAV・口数・金額は桁が大きく口数差分の精度が必要なため float64 のまま)
+    for col in _FLOAT32_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("float32")
+
+    return df
 
 
 def append_daily(new_df: pd.DataFrame, path: Path = ETF_TIMESERIES_PATH) -> None:
@@ -122,14 +166,20 @@ def append_daily(new_df: pd.DataFrame, path: Path = ETF_TIMESERIES_PATH) -> None
         logger.info(f"既存データ読み込み (local): {len(existing)} 行")
 
     if not existing.empty:
-        existing["date"] = pd.to_datetime(existing["date"])
+        existing["date"] = _as_datetime(existing["date"])
         new_df["date"] = pd.to_datetime(new_df["date"])
 
-        # 重複除去: 新データを優先
-        combined = pd.concat([existing, new_df], ignore_index=True)
-        combined = combined.drop_duplicates(
-            subset=["etf_code", "date"], keep="last"
-        )
+        # 重複除去: 新データと同じ (etf_code, date) の既存行を落として連結する
+        # (既存データは過去の追記で重複除去済みなので、新データ側だけ確認すればよい)
+        new_df = new_df.drop_duplicates(subset=["etf_code", "date"], keep="last")
+        new_keys = pd.MultiIndex.from_frame(new_df[["etf_code", "date"]])
+        # 日次追記の新データは数日分なので、まず日付で候補行を絞る
+        candidates = existing[existing["date"].isin(new_df["date"].unique())]
+        overlap = candidates.index[
+            pd.MultiIndex.from_frame(candidates[["etf_code", "date"]]).isin(new_keys)
+        ]
+        combined = pd.concat([existing.drop(overlap), new_df], ignore_index=True)
+        # 同じ銘柄の行を並べておくと列ごとの圧縮が効き、ファイルが小さくなる
         combined = combined.sort_values(["etf_code", "date"]).reset_index(drop=True)
     else:
         combined = new_df
@@ -173,15 +223,29 @@ def load_etf_master(path: Path = ETF_MASTER_PATH) -> pd.DataFrame:
     return pd.DataFrame()
 
 
-def update_etf_master(new_df: pd.DataFrame, path: Path = ETF_MASTER_PATH) -> None:
-    """ETFマスタを更新 (code で重複除去、新データ優先)"""
-    existing = load_etf_master(path)
+def update_etf_master(
+    new_df: pd.DataFrame,
+    path: Path = ETF_MASTER_PATH,
+    existing: pd.DataFrame | None = None,
+) -> pd.DataFrame:
+    """
+    ETFマスタを更新 (code で重複除去、新データ優先)
+
+    Args:
+        existing: 読み込み済みの現在のマスタ。省略時はストアから読み込む。
+
+    Returns:
+        更新後のETFマスタ
+    """
+    if existing is None:
+        existing = load_etf_master(path)
     if not existing.empty:
         combined = pd.concat([existing, new_df], ignore_index=True)
         combined = combined.drop_duplicates(subset=["code"], keep="last")
     else:
         combined = new_df
     save_etf_master(combined, path)
+    return combined
 
 
 # ============================================================
@@ -195,7 +259,7 @@ def save_holdings(df: pd.DataFrame, path: Path = HOLDINGS_PATH) -> None:
     ensure_store_dir()
 
     buf = io.BytesIO()
-    df.to_parquet(buf, index=False, engine="pyarrow")
+    df.to_parquet(buf, **_PARQUET_WRITE_OPTIONS)
     parquet_bytes = buf.getvalue()
 
     path.write_bytes(parquet_bytes)
@@ -222,7 +286,7 @@ def load_holdings(path: Path = HOLDINGS_PATH) -> pd.DataFrame:
         return pd.DataFrame()
 
     if "date" in df.columns:
-        df["date"] = pd.to_datetime(df["date"])
+        df["date"] = _as_datetime(df["date"])
 
     return df.reset_index(drop=True)
 
@@ -247,7 +311,7 @@ def append_holdings(new_df: pd.DataFrame, path: Path = HOLDINGS_PATH) -> None:
     new_df["date"] = pd.to_datetime(new_df["date"])
 
     if not existing.empty:
-        existing["date"] = pd.to_datetime(existing["date"])
+        existing["date"] = _as_datetime(existing["date"])
 
         # 重複除去
         combined = pd.concat([existing, new_df], ignore_index=True)
@@ -8,7 +8,7 @@ from datetime import date, datetime
 from typing import Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class ETFMaster:
     """ETFマスタ情報"""
     code: str                           # "1306", "2640", "380A"
@@ -19,7 +19,7 @@ class ETFMaster:
     listing_date: Optional[date] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class FuturesPosition:
     """正規化された先物ポジション"""
     raw_name: str                       # 生データの銘柄名 (例: "TOPIX 2603")
@@ -30,7 +30,7 @@ class FuturesPosition:
     multiplier: int = 1                 # 掛け目
 
 
-@dataclass
+@dataclass(slots=True)
 class PCFRecord:
     """1日1ETFのPCF集計レコード（Excelの1行に対応）"""
     etf_code: str
@@ -52,7 +52,7 @@ class PCFRecord:
         return None
 
 
-@dataclass
+@dataclass(slots=True)
 class CreationRedemption:
     """設定・交換の日次レコード"""
     etf_code: str
@@ -14,9 +14,19 @@ Usage:
 import sys
 import argparse
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
 from pathlib import Path
 
+import pandas as pd
+
+try:
+    import jpholiday
+    _HAS_JPHOLIDAY = True
+except ImportError:
+    _HAS_JPHOLIDAY = False
+
 # JST タイムゾーン (UTC+9)
 JST = timezone(timedelta(hours=9))
 
@@ -27,10 +37,11 @@ from config import (
     ETF_MASTER_PATH, TOPIX_ETF_CODES, NIKKEI225_ETF_CODES,
 )
 from data.fetcher import (
-    fetch_ice_pcf, fetch_ice_bulk, fetch_all_pcf, fetch_spglobal_bulk,
+    fetch_ice_pcf, fetch_ice_bulk, fetch_spglobal_bulk, fetch_all_pcf,
     discover_etf_codes_from_jpx,
 )
-from data.parser_pcf import parse_pcf
+from data.cache import clear_old_cache
+from data.parse_cache import parse_pcf_cached
 from data.parser_holdings import parse_holdings
 from data.excel_importer import records_to_dataframe, masters_to_dataframe
 from data.storage import (
@@ -48,7 +59,15 @@ logger = logging.getLogger(__name__)
 # 対象ETFコード（TOPIX + 日経225）
 TARGET_CODES = set(TOPIX_ETF_CODES + NIKKEI225_ETF_CODES)
 
+# --range で同時に取得する営業日数
+RANGE_WORKERS = 4
+
+# 実行ごとに古いキャッシュを掃除するプロバイダ
+CACHE_PROVIDERS = ("spglobal", "ice", "solactive")
 
+
+# --range とその各日の取得で同じ日を何度も判定するためキャッシュする
+@lru_cache(maxsize=None)
 def is_jpx_business_day(d: date) -> bool:
     """JPXの営業日かどうかを判定"""
     # 土日チェック
@@ -56,33 +75,24 @@ def is_jpx_business_day(d: date) -> bool:
         return False
 
     # 祝日チェック
-    try:
-        import jpholiday
-        if jpholiday.is_holiday(d):
-            return False
-    except ImportError:
+    if not _HAS_JPHOLIDAY:
         logger.warning("jpholidayがインストールされていません。祝日チェックをスキップします。")
+    elif jpholiday.is_holiday(d):
+        return False
 
     return True
 
 
-def fetch_and_store(target_date: date, discover_new: bool = False):
+def prepare_etf_master(discover_new: bool = False):
     """
-    PCFデータを取得してストアに追記する。
-
-    S&P Globalをプライマリプロバイダとして一括ZIP取得し、
-    取得できなかった銘柄はICEでフォールバック取得する。
+    ETFマスタを読み込み、必要なら新規ETFを検出してマスタに追加する。
 
     Args:
-        target_date: 対象日付
-        discover_new: 新規ETFを自動検出するか
-    """
-    logger.info(f"=== 日次PCFデータ取得 ({target_date}) ===")
-
-    if not is_jpx_business_day(target_date):
-        logger.warning(f"{target_date} は営業日ではありません")
+        discover_new: 新規ETFを自動検出するか (マスタが空なら常に検出する)
 
-    # ETFマスタ読み込み
+    Returns:
+        ETFマスタの DataFrame
+    """
     master_df = load_etf_master()
 
     if master_df.empty:
@@ -106,10 +116,54 @@ def fetch_and_store(target_date: date, discover_new: bool = False):
                         "category": "other",
                         "has_futures": False,
                     })
-                import pandas as pd
                 new_master_df = pd.DataFrame(new_masters)
-                update_etf_master(new_master_df)
-                master_df = load_etf_master()
+                # 読み込み済みのマスタに追加し、保存後の再読み込みはしない
+                master_df = update_etf_master(new_master_df, existing=master_df)
+
+    return master_df
+
+
+def _parse_provider(
+    csv_texts: dict[str, str], provider: str,
+) -> tuple[list, list[tuple[str, str]], list[pd.DataFrame]]:
+    """
+    1プロバイダ分のCSVから日次レコードと個別銘柄保有残高をパースする。
+
+    Returns:
+        (日次レコードのリスト, パース失敗の (プロバイダ, コード) リスト,
+         個別銘柄保有残高の DataFrame リスト)
+    """
+    records = []
+    parse_errors = []
+    holdings_frames = []
+    for code, csv_text in csv_texts.items():
+        record = parse_pcf_cached(csv_text, code, provider=provider)
+        if record:
+            records.append(record)
+        else:
+            parse_errors.append((provider, code))
+
+        holdings = parse_holdings(csv_text, code, provider=provider)
+        if not holdings.empty:
+            holdings_frames.append(holdings)
+    return records, parse_errors, holdings_frames
+
+
+def collect_day(target_date: date) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    1営業日分のPCFを取得・パースする（ストアへの追記はしない）。
+
+    S&P Globalをプライマリプロバイダとして一括ZIP取得し、
+    取得できなかった銘柄はICEでフォールバック取得する。
+
+    Returns:
+        (日次レコードの DataFrame, 個別銘柄保有残高の DataFrame)。
+        取得できなかった場合はそれぞれ空の DataFrame。
+    """
+    logger.info(f"=== 日次PCFデータ取得 ({target_date}) ===")
+
+    if not is_jpx_business_day(target_date):
+        logger.warning(f"{target_date} は営業日ではありません")
 
     # ============================================================
     # Step 1: S&P Global 一括ZIP取得 (プライマリ)
@@ -121,37 +175,31 @@ def fetch_and_store(target_date: date, discover_new: bool = False):
     )
 
     # ============================================================
-    # Step 2: ICE 一括ZIP取得 (S&P Globalで取れなかった銘柄)
+    # Step 2: S&P Global分のパース（日次レコード + 個別銘柄保有残高）
+    # Step 3: ICE 一括ZIPから補完 (S&P Globalで取れなかった銘柄)
+    #   ICE が必要な場合だけダウンロードし、待つ間に S&P Global 分をパースする
     # ============================================================
     missing_codes = TARGET_CODES - set(spg_target.keys())
     ice_results = {}
     if missing_codes:
-        logger.info(f"ICE一括ZIP: {len(missing_codes)} 銘柄を取得")
-        all_ice = fetch_ice_bulk(target_date)
+        logger.info(f"ICE一括ZIP: {len(missing_codes)} 銘柄を補完")
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            ice_future = executor.submit(fetch_ice_bulk, target_date)
+            records, parse_errors, holdings_frames = _parse_provider(
+                spg_target, "spglobal"
+            )
+            all_ice = ice_future.result()
         ice_results = {k: v for k, v in all_ice.items() if k in missing_codes}
         logger.info(f"ICE: {len(ice_results)}/{len(missing_codes)} 取得成功")
+    else:
+        records, parse_errors, holdings_frames = _parse_provider(
+            spg_target, "spglobal"
+        )
 
-    # ============================================================
-    # Step 3: パース
-    # ============================================================
-    records = []
-    parse_errors = []
-
-    # S&P Global分
-    for code, csv_text in spg_target.items():
-        record = parse_pcf(csv_text, code, provider="spglobal")
-        if record:
-            records.append(record)
-        else:
-            parse_errors.append(("spglobal", code))
-
-    # ICE分
-    for code, csv_text in ice_results.items():
-        record = parse_pcf(csv_text, code, provider="ice")
-        if record:
-            records.append(record)
-        else:
-            parse_errors.append(("ice", code))
+    ice_records, ice_errors, ice_holdings = _parse_provider(ice_results, "ice")
+    records += ice_records
+    parse_errors += ice_errors
+    holdings_frames += ice_holdings
 
     logger.info(
         f"パース完了: 成功 {len(records)}, "
@@ -160,35 +208,17 @@ def fetch_and_store(target_date: date, discover_new: bool = False):
     if parse_errors:
         logger.warning(f"パース失敗: {parse_errors}")
 
-    # ============================================================
-    # Step 4: ストア追記
-    # ============================================================
     if records:
         df = records_to_dataframe(records)
         df["market_value_type"] = "mtm"  # PCF CSVデータ = 時価評価 (mark-to-market)
-        append_daily(df)
-        logger.info(f"ストアに {len(df)} レコードを追記しました")
     else:
-        logger.warning("パースされたレコードがありません")
+        logger.warning(f"パースされたレコードがありません ({target_date})")
+        df = pd.DataFrame()
 
-    # ============================================================
-    # Step 5: 個別銘柄保有残高の抽出・保存
-    # ============================================================
-    all_holdings = []
-    for code, csv_text in spg_target.items():
-        holdings = parse_holdings(csv_text, code, provider="spglobal")
-        all_holdings.extend(holdings)
-    for code, csv_text in ice_results.items():
-        holdings = parse_holdings(csv_text, code, provider="ice")
-        all_holdings.extend(holdings)
-
-    if all_holdings:
-        import pandas as pd
-        holdings_df = pd.DataFrame(all_holdings)
-        append_holdings(holdings_df)
-        logger.info(f"個別銘柄保有残高: {len(holdings_df)} 行を追記")
+    if holdings_frames:
+        holdings_df = pd.concat(holdings_frames, ignore_index=True)
     else:
-        logger.info("個別銘柄保有残高: 0 行")
+        holdings_df = pd.DataFrame()
 
     # 取得できなかった銘柄
     all_fetched = set(spg_target.keys()) | set(ice_results.keys())
@@ -196,8 +226,45 @@ def fetch_and_store(target_date: date, discover_new: bool = False):
     if still_missing:
         logger.warning(f"取得できなかった銘柄: {sorted(still_missing)}")
 
+    return df, holdings_df
+
+
+def store_results(df: pd.DataFrame, holdings_df: pd.DataFrame) -> int:
+    """
+    collect_day の結果をストアに追記する。
+
+    Returns:
+        追記した日次レコード数
+    """
+    if not df.empty:
+        append_daily(df)
+        logger.info(f"ストアに {len(df)} レコードを追記しました")
+
+    if not holdings_df.empty:
+        append_holdings(holdings_df)
+        logger.info(f"個別銘柄保有残高: {len(holdings_df)} 行を追記")
+    else:
+        logger.info("個別銘柄保有残高: 0 行")
+
+    return len(df)
+
+
+def fetch_and_store(target_date: date, discover_new: bool = False):
+    """
+    PCFデータを取得してストアに追記する。
+
+    Args:
+        target_date: 対象日付
+        discover_new: 新規ETFを自動検出するか
+    """
+    # ETFマスタ読み込み・新規ETF検出
+    prepare_etf_master(discover_new)
+
+    df, holdings_df = collect_day(target_date)
+    count = store_results(df, holdings_df)
+
     logger.info(f"=== 完了 ({target_date}) ===")
-    return len(records)
+    return count
 
 
 def main():
@@ -228,16 +295,50 @@ def main():
         date_to = datetime.strptime(args.range[1], "%Y-%m-%d").date()
         logger.info(f"日付範囲モード: {date_from} ~ {date_to}")
 
+        # ETFマスタの読み込み・新規ETF検出は範囲全体で1回だけ行う
+        prepare_etf_master(discover_new=args.discover)
+
+        business_days = []
         current = date_from
-        total = 0
         while current <= date_to:
             if is_jpx_business_day(current):
-                count = fetch_and_store(current, discover_new=args.discover)
-                total += count
+                business_days.append(current)
             else:
                 logger.info(f"{current} は非営業日のためスキップ")
             current += timedelta(days=1)
 
+        # 営業日ごとの取得・パースは独立しているので並列に行う。
+        # 失敗した日はログに残して飛ばし、取得できた日の分だけを
+        # 全日程終了後にまとめて1回でストアへ追記する
+        frames = []
+        holdings_frames = []
+        failed_days = []
+        with ThreadPoolExecutor(max_workers=RANGE_WORKERS) as executor:
+            futures = {
+                executor.submit(collect_day, d): d for d in business_days
+            }
+            for future in as_completed(futures):
+                target_date = futures[future]
+                try:
+                    df, holdings_df = future.result()
+                except Exception as e:
+                    logger.error(f"{target_date} の取得に失敗しました: {e}")
+                    failed_days.append(target_date)
+                    continue
+                if not df.empty:
+                    frames.append(df)
+                if not holdings_df.empty:
+                    holdings_frames.append(holdings_df)
+                logger.info(f"=== 取得完了 ({target_date}) ===")
+
+        total = store_results(
+            pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(),
+            pd.concat(holdings_frames, ignore_index=True)
+            if holdings_frames else pd.DataFrame(),
+        )
+
+        if failed_days:
+            logger.warning(f"取得に失敗した日: {[str(d) for d in sorted(failed_days)]}")
         logger.info(f"=== 全日程完了: 合計 {total} レコード ===")
     else:
         if args.date:
@@ -248,6 +349,9 @@ def main():
 
         fetch_and_store(target_date, discover_new=args.discover)
 
+    for provider in CACHE_PROVIDERS:
+        clear_old_cache(provider)
+
 
 if __name__ == "__main__":
     main()
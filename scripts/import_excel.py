@@ -49,26 +49,26 @@ def main():
     logger.info(f"総レコード数: {len(df_ts)}")
 
     # 先物パターンの確認
-    futures_types = df_ts[df_ts["futures1_type"].notna()]["futures1_type"].value_counts()
+    futures_types = df_ts["futures1_type"].value_counts()  # NaN は value_counts が除外する
     if not futures_types.empty:
         logger.info(f"\n先物種別 (先物1):")
         for ft, count in futures_types.items():
             logger.info(f"  {ft}: {count}")
 
-    futures2_types = df_ts[df_ts["futures2_type"].notna()]["futures2_type"].value_counts()
+    futures2_types = df_ts["futures2_type"].value_counts()
     if not futures2_types.empty:
         logger.info(f"\n先物種別 (先物2):")
         for ft, count in futures2_types.items():
             logger.info(f"  {ft}: {count}")
 
     # UNKNOWN先物の詳細
-    unknown = df_ts[df_ts["futures1_type"] == "UNKNOWN"]["futures1_raw_name"].unique()
+    unknown = df_ts.loc[df_ts["futures1_type"] == "UNKNOWN", "futures1_raw_name"].unique()
     if len(unknown) > 0:
         logger.warning(f"\n未分類の先物銘柄名 (先物1):")
         for name in unknown:
             logger.warning(f"  '{name}'")
 
-    unknown2 = df_ts[df_ts["futures2_type"] == "UNKNOWN"]["futures2_raw_name"].unique()
+    unknown2 = df_ts.loc[df_ts["futures2_type"] == "UNKNOWN", "futures2_raw_name"].unique()
     if len(unknown2) > 0:
         logger.warning(f"\n未分類の先物銘柄名 (先物2):")
         for name in unknown2:
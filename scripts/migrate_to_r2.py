@@ -12,16 +12,16 @@ Usage:
     R2_ACCOUNT_ID=xxx R2_ACCESS_KEY_ID=xxx R2_SECRET_ACCESS_KEY=xxx R2_BUCKET_NAME=pcf-data python scripts/migrate_to_r2.py
 """
 import sys
-import io
 import logging
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import numpy as np
 import pandas as pd
 
 from config import ETF_TIMESERIES_PATH, ETF_MASTER_PATH
-from data.r2_storage import r2_put, r2_available
+from data.r2_storage import r2_put_file, r2_available
 
 logging.basicConfig(
     level=logging.INFO,
@@ -50,8 +50,8 @@ def migrate_timeseries():
     # market_value_type カラムを追加
     if "market_value_type" not in df.columns:
         logger.info("market_value_type カラムを追加中...")
-        df["market_value_type"] = df["date"].apply(
-            lambda d: "notional" if d <= EXCEL_CUTOFF_DATE else "mtm"
+        df["market_value_type"] = np.where(
+            df["date"] <= EXCEL_CUTOFF_DATE, "notional", "mtm"
         )
         notional_count = (df["market_value_type"] == "notional").sum()
         mtm_count = (df["market_value_type"] == "mtm").sum()
@@ -59,18 +59,19 @@ def migrate_timeseries():
         logger.info(f"  mtm (PCF CSV): {mtm_count} 行")
 
         # ローカルにも保存（市場value_type付き）
-        df.to_parquet(ETF_TIMESERIES_PATH, index=False, engine="pyarrow")
+        # data/storage.py と同じく zstd で圧縮し、アップロードするバイト数を減らす
+        df.to_parquet(
+            ETF_TIMESERIES_PATH, index=False, engine="pyarrow",
+            compression="zstd", compression_level=3,
+        )
         logger.info(f"ローカル更新完了: {ETF_TIMESERIES_PATH}")
     else:
         logger.info("market_value_type カラムは既に存在します")
 
-    # R2 にアップロード
-    buf = io.BytesIO()
-    df.to_parquet(buf, index=False, engine="pyarrow")
-    parquet_bytes = buf.getvalue()
-
-    logger.info(f"R2 にアップロード中 (pcf/etf_timeseries.parquet, {len(parquet_bytes):,} bytes)...")
-    if r2_put("pcf/etf_timeseries.parquet", parquet_bytes):
+    # R2 にアップロード（ローカルファイルをメモリに載せずにそのまま送る）
+    size = ETF_TIMESERIES_PATH.stat().st_size
+    logger.info(f"R2 にアップロード中 (pcf/etf_timeseries.parquet, {size:,} bytes)...")
+    if r2_put_file("pcf/etf_timeseries.parquet", ETF_TIMESERIES_PATH):
         logger.info("R2 アップロード成功: pcf/etf_timeseries.parquet")
         return True
     else:
@@ -84,12 +85,11 @@ def migrate_master():
         logger.error(f"ETFマスタが見つかりません: {ETF_MASTER_PATH}")
         return False
 
-    logger.info(f"ETFマスタ読み込み: {ETF_MASTER_PATH}")
-    content = ETF_MASTER_PATH.read_bytes()
-    logger.info(f"  サイズ: {len(content):,} bytes")
+    logger.info(f"ETFマスタ: {ETF_MASTER_PATH}")
+    logger.info(f"  サイズ: {ETF_MASTER_PATH.stat().st_size:,} bytes")
 
     logger.info("R2 にアップロード中 (pcf/etf_master.csv)...")
-    if r2_put("pcf/etf_master.csv", content):
+    if r2_put_file("pcf/etf_master.csv", ETF_MASTER_PATH):
         logger.info("R2 アップロード成功: pcf/etf_master.csv")
         return True
     else:
@@ -3,6 +3,7 @@
 """
 from __future__ import annotations
 
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
@@ -25,11 +26,20 @@ def _format_yen(value: float) -> str:
         return f"{value:.0f}円"
 
 
-def _format_yen_table(value: float) -> str:
-    """テーブル用: 億円で丸めて表示"""
-    if pd.isna(value):
-        return "---"
-    return f"{value/1e8:,.0f}億円"
+def _format_yen_series(values) -> np.ndarray:
+    """_format_yen の列版: 金額の列をまとめて文字列に変換する"""
+    arr = np.asarray(values, dtype=np.float64)
+    abs_val = np.abs(arr)
+    out = np.full(arr.shape, "---", dtype=object)
+    cho = abs_val >= 1e12
+    oku = (abs_val >= 1e8) & ~cho
+    man = (abs_val >= 1e4) & (abs_val < 1e8)
+    yen = abs_val < 1e4  # NaN はどれにも入らず "---" のまま
+    out[cho] = list(map("{:.1f}兆円".format, (arr[cho] / 1e12).tolist()))
+    out[oku] = list(map("{:.0f}億円".format, (arr[oku] / 1e8).tolist()))
+    out[man] = list(map("{:.0f}万円".format, (arr[man] / 1e4).tolist()))
+    out[yen] = list(map("{:.0f}円".format, arr[yen].tolist()))
+    return out
 
 
 # Plotlyの色パレット（ETF別の色分け）
@@ -51,6 +61,22 @@ def render_creation_redemption_chart(
         st.warning("データがありません")
         return
 
+    fig = _build_creation_redemption_figure(daily_df, title, etf_breakdown, index_df)
+    st.plotly_chart(fig, width="stretch")
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _build_creation_redemption_figure(
+    daily_df: pd.DataFrame,
+    title: str,
+    etf_breakdown: pd.DataFrame | None,
+    index_df: pd.DataFrame | None,
+) -> go.Figure:
+    """
+    render_creation_redemption_chart の図を組み立てる。
+
+    ウィジェット操作による再実行で同じデータの図を作り直さないようキャッシュする。
+    """
     has_index = index_df is not None and not index_df.empty
 
     fig = make_subplots(
@@ -72,44 +98,49 @@ def render_creation_redemption_chart(
             for i, label in enumerate(sorted(etf_labels))
         }
 
-        for etf_label in sorted(etf_labels):
-            etf_data = etf_breakdown[etf_breakdown["etf_label"] == etf_label]
-            daily_etf = etf_data.groupby("date")["flow_amount"].sum().reset_index()
+        # (ETF, 日付) ごとの合計を1回の groupby で求め、ETFごとに切り出す
+        daily_by_label = etf_breakdown.groupby(["etf_label", "date"])["flow_amount"].sum()
+
+        # トレースはまとめて1回で追加する（add_trace ごとの図全体の検証を避ける）
+        bars = []
+        for etf_label, daily_etf in daily_by_label.groupby(level="etf_label"):
+            daily_etf = daily_etf.droplevel("etf_label").reset_index()
+            # ホバー用の金額表示は1回だけ作り、設定・交換の両トレースで使い回す
+            flow = daily_etf["flow_amount"].to_numpy()
+            flow_labels = _format_yen_series(flow)
 
             # 設定(正)
-            creation = daily_etf.copy()
-            creation["flow_amount"] = creation["flow_amount"].clip(lower=0)
-            fig.add_trace(
+            creation = daily_etf["flow_amount"].clip(lower=0)
+            bars.append(
                 go.Bar(
-                    x=creation["date"],
-                    y=creation["flow_amount"],
+                    x=daily_etf["date"],
+                    y=creation,
                     name=etf_label,
                     marker_color=color_map[etf_label],
                     legendgroup=etf_label,
                     hovertemplate=f"{etf_label}<br>%{{x}}<br>%{{customdata}}<extra></extra>",
-                    customdata=[_format_yen(v) for v in creation["flow_amount"]],
-                ),
-                row=1, col=1, secondary_y=False,
+                    customdata=np.where(flow < 0, "0円", flow_labels),
+                )
             )
 
             # 交換(負)
-            redemption = daily_etf.copy()
-            redemption["flow_amount"] = redemption["flow_amount"].clip(upper=0)
-            has_redemption = (redemption["flow_amount"] < 0).any()
+            redemption = daily_etf["flow_amount"].clip(upper=0)
+            has_redemption = (redemption < 0).any()
             if has_redemption:
-                fig.add_trace(
+                bars.append(
                     go.Bar(
-                        x=redemption["date"],
-                        y=redemption["flow_amount"],
+                        x=daily_etf["date"],
+                        y=redemption,
                         name=etf_label,
                         marker_color=color_map[etf_label],
                         legendgroup=etf_label,
                         showlegend=False,
                         hovertemplate=f"{etf_label}<br>%{{x}}<br>%{{customdata}}<extra></extra>",
-                        customdata=[_format_yen(v) for v in redemption["flow_amount"]],
-                    ),
-                    row=1, col=1, secondary_y=False,
+                        customdata=np.where(flow > 0, "0円", flow_labels),
+                    )
                 )
+
+        fig.add_traces(bars, rows=1, cols=1, secondary_ys=[False] * len(bars))
     else:
         fig.add_trace(
             go.Bar(
@@ -118,7 +149,7 @@ def render_creation_redemption_chart(
                 name="設定",
                 marker_color="rgba(55, 128, 235, 0.7)",
                 hovertemplate="%{x}<br>設定: %{customdata}<extra></extra>",
-                customdata=[_format_yen(v) for v in daily_df["total_creation"]],
+                customdata=_format_yen_series(daily_df["total_creation"]),
             ),
             row=1, col=1, secondary_y=False,
         )
@@ -129,7 +160,7 @@ def render_creation_redemption_chart(
                 name="交換",
                 marker_color="rgba(235, 55, 55, 0.7)",
                 hovertemplate="%{x}<br>交換: %{customdata}<extra></extra>",
-                customdata=[_format_yen(v) for v in daily_df["total_redemption"]],
+                customdata=_format_yen_series(daily_df["total_redemption"]),
             ),
             row=1, col=1, secondary_y=False,
         )
@@ -162,7 +193,7 @@ def render_creation_redemption_chart(
             line=dict(color="rgba(55, 180, 55, 0.8)", width=2),
             fillcolor="rgba(55, 180, 55, 0.15)",
             hovertemplate="%{x}<br>累積: %{customdata}<extra></extra>",
-            customdata=[_format_yen(v) for v in daily_df["cumulative_flow"]],
+            customdata=_format_yen_series(daily_df["cumulative_flow"]),
         ),
         row=2, col=1,
     )
@@ -178,8 +209,7 @@ def render_creation_redemption_chart(
 
     fig.update_yaxes(title_text="金額 (円)", secondary_y=False, row=1, col=1)
     fig.update_yaxes(title_text="累積 (円)", row=2, col=1)
-
-    st.plotly_chart(fig, width="stretch")
+    return fig
 
 
 def render_daily_ranking(
@@ -193,15 +223,17 @@ def render_daily_ranking(
         st.info("選択日のデータがありません")
         return
 
-    display = ranking_df.copy()
-    display["金額"] = display["flow_amount"].apply(_format_yen_table)
-    display = display.rename(columns={
+    # 金額は億円単位の数値で渡し、表示形式は column_config で指定する
+    display = ranking_df.assign(金額=ranking_df["flow_amount"] / 1e8).rename(columns={
         "etf_code": "コード",
         "etf_label": "名称",
     })
 
     st.dataframe(
         display[["コード", "名称", "金額"]],
+        column_config={
+            "金額": st.column_config.NumberColumn(format="%,.0f億円"),
+        },
         width="stretch",
         hide_index=True,
     )
@@ -218,6 +250,12 @@ def render_etf_detail_chart(
         st.warning(f"{etf_code} のデータがありません")
         return
 
+    st.plotly_chart(_build_etf_detail_figure(etf_df, etf_code), width="stretch")
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _build_etf_detail_figure(etf_df: pd.DataFrame, etf_code: str) -> go.Figure:
+    """render_etf_detail_chart の図を組み立てる（同じデータでの再実行時はキャッシュを使う）"""
     fig = make_subplots(
         rows=2, cols=1,
         shared_xaxes=True,
@@ -229,10 +267,10 @@ def render_etf_detail_chart(
         ),
     )
 
-    colors = [
-        "rgba(55, 128, 235, 0.7)" if v >= 0 else "rgba(235, 55, 55, 0.7)"
-        for v in etf_df["flow_amount"]
-    ]
+    colors = np.where(
+        etf_df["flow_amount"].to_numpy() >= 0,
+        "rgba(55, 128, 235, 0.7)", "rgba(235, 55, 55, 0.7)",
+    )
     fig.add_trace(
         go.Bar(
             x=etf_df["date"],
@@ -240,7 +278,7 @@ def render_etf_detail_chart(
             name="設定/交換金額",
             marker_color=colors,
             hovertemplate="%{x}<br>%{customdata}<extra></extra>",
-            customdata=[_format_yen(v) for v in etf_df["flow_amount"]],
+            customdata=_format_yen_series(etf_df["flow_amount"]),
         ),
         row=1, col=1,
     )
@@ -261,8 +299,7 @@ def render_etf_detail_chart(
         showlegend=True,
         legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
     )
-
-    st.plotly_chart(fig, width="stretch")
+    return fig
 
 
 def render_summary_metrics(daily_df: pd.DataFrame, category_label: str) -> None:
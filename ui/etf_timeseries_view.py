@@ -8,26 +8,34 @@ from __future__ import annotations
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
 import streamlit as st
 
+# 金額列の表示形式（整数に切り捨ててカンマ区切り + 円）
+_YEN_COLUMN = st.column_config.NumberColumn(format="%,d円")
+
+# CSV エクスポートで整数として書き出す列（金額・口数・枚数・掛け目）
+_CSV_INTEGER_COLUMNS = [
+    "nav", "shares_outstanding", "cash_component", "equity_market_value",
+    "equity_count_tse",
+    "futures1_quantity", "futures1_market_value", "futures1_multiplier",
+    "futures2_quantity", "futures2_market_value", "futures2_multiplier",
+]
+
 
 def _fmt_yen(value) -> str:
     """金額をカンマ区切り + 円で表示（丸めなし）"""
-    if value is None or (isinstance(value, float) and np.isnan(value)):
+    # value != value は NaN 判定（numpy の float32 等のスカラーも含む）
+    if value is None or value != value:
         return ""
     return f"{int(value):,}円"
 
 
-def _fmt_int(value) -> str:
-    """整数をカンマ区切りで表示"""
-    if value is None or (isinstance(value, float) and np.isnan(value)):
-        return ""
-    return f"{int(value):,}"
-
-
 def _fmt_shares(value) -> str:
     """枚数をカンマ区切り + 枚で表示"""
-    if value is None or (isinstance(value, float) and np.isnan(value)):
+    if value is None or value != value:
         return ""
     return f"{int(value):,}枚"
 
@@ -54,8 +62,11 @@ def render_etf_timeseries(
     )
 
     # --- 対象ETFのデータ抽出 ---
-    etf_df = ts_df[ts_df["etf_code"] == selected_code].copy()
-    etf_df = etf_df.sort_values("date", ascending=False)
+    etf_df = ts_df[ts_df["etf_code"] == selected_code]
+    # load_timeseries が日付順に並べているので、通常は逆順にするだけでよい
+    if not etf_df["date"].is_monotonic_increasing:
+        etf_df = etf_df.sort_values("date", kind="stable")
+    etf_df = etf_df.iloc[::-1]
 
     if etf_df.empty:
         st.info(f"{selected_code} のデータがありません")
@@ -98,11 +109,12 @@ def render_etf_timeseries(
     st.markdown("---")
 
     # --- 時系列テーブル構築 ---
-    display_df = _build_display_table(etf_df, has_futures)
+    display_df, column_config = _build_display_table(etf_df, has_futures)
 
     # テーブル表示
     st.dataframe(
         display_df,
+        column_config=column_config,
         use_container_width=True,
         hide_index=True,
         height=min(len(display_df) * 35 + 40, 800),
@@ -121,75 +133,94 @@ def render_etf_timeseries(
 def _build_display_table(
     etf_df: pd.DataFrame,
     has_futures: bool,
-) -> pd.DataFrame:
-    """表示用のDataFrameを構築する"""
-    rows = []
-    for _, row in etf_df.iterrows():
-        d = {
-            "日付": row["date"].strftime("%Y-%m-%d"),
-            "NAV（円）": _fmt_yen(row["nav"]),
-            "1口NAV（円）": f"{row['nav_per_unit']:,.2f}円" if pd.notna(row.get("nav_per_unit")) else "",
-            "発行済口数": _fmt_int(row["shares_outstanding"]),
-            "現金（円）": _fmt_yen(row["cash_component"]),
-            "株式残高（円）": _fmt_yen(row["equity_market_value"]),
-        }
-
-        if has_futures:
-            # 先物1
-            ft1 = row.get("futures1_type", "")
-            if pd.notna(ft1) and ft1:
-                fq1 = row.get("futures1_quantity")
-                fm1 = row.get("futures1_contract_month", "")
-                fmv1 = row.get("futures1_market_value")
-                fmult1 = row.get("futures1_multiplier", 1) or 1
-
-                # 想定元本を計算
-                notional1 = _calc_notional(fmv1, fq1, fmult1)
-
-                d["先物1"] = f"{ft1} {fm1}" if fm1 else ft1
-                d["先物1枚数"] = _fmt_shares(fq1) if pd.notna(fq1) else ""
-                d["先物1想定元本（円）"] = _fmt_yen(notional1) if notional1 else ""
-            else:
-                d["先物1"] = ""
-                d["先物1枚数"] = ""
-                d["先物1想定元本（円）"] = ""
-
-            # 先物2
-            ft2 = row.get("futures2_type", "")
-            if pd.notna(ft2) and ft2:
-                fq2 = row.get("futures2_quantity")
-                fm2 = row.get("futures2_contract_month", "")
-                fmv2 = row.get("futures2_market_value")
-                fmult2 = row.get("futures2_multiplier", 1) or 1
-
-                notional2 = _calc_notional(fmv2, fq2, fmult2)
-
-                d["先物2"] = f"{ft2} {fm2}" if fm2 else ft2
-                d["先物2枚数"] = _fmt_shares(fq2) if pd.notna(fq2) else ""
-                d["先物2想定元本（円）"] = _fmt_yen(notional2) if notional2 else ""
-
-        rows.append(d)
-
-    return pd.DataFrame(rows)
-
-
-def _calc_notional(mv, qty, mult) -> float:
-    """想定元本を計算（aggregatorと同じロジック）"""
-    if mv is None or (isinstance(mv, float) and np.isnan(mv)) or not mv:
-        return 0.0
-    if qty is None or (isinstance(qty, float) and np.isnan(qty)) or not qty:
-        return mv
-    if mult is None or (isinstance(mult, float) and np.isnan(mult)) or not mult:
-        return mv
-    unit_est = abs(mv) / (abs(qty) * mult)
-    if unit_est >= 100:
-        return mv  # 既に想定元本
-    else:
-        return mv * mult  # multiplier適用
-
-
-def _build_csv_export(etf_df: pd.DataFrame, etf_code: str) -> str:
-    """CSV エクスポート用の文字列を生成"""
+) -> tuple[pd.DataFrame, dict]:
+    """
+    表示用のDataFrameと st.dataframe の column_config を構築する。
+
+    数値列は数値のまま残し、カンマ区切り・単位の表示は column_config に任せる
+    （列ヘッダーのクリックで数値順に並べ替えられる）。欠損は空欄になる。
+    """
+    columns = {
+        "日付": etf_df["date"].dt.strftime("%Y-%m-%d").to_numpy(),
+        "NAV（円）": _column_array(etf_df, "nav", np.nan),
+        "1口NAV（円）": _column_array(etf_df, "nav_per_unit", np.nan),
+        "発行済口数": _column_array(etf_df, "shares_outstanding", np.nan),
+        "現金（円）": _column_array(etf_df, "cash_component", np.nan),
+        "株式残高（円）": _column_array(etf_df, "equity_market_value", np.nan),
+    }
+    column_config = {
+        "NAV（円）": _YEN_COLUMN,
+        "1口NAV（円）": st.column_config.NumberColumn(format="%,.2f円"),
+        "発行済口数": st.column_config.NumberColumn(format="%,d"),
+        "現金（円）": _YEN_COLUMN,
+        "株式残高（円）": _YEN_COLUMN,
+    }
+
+    if has_futures:
+        for slot in (1, 2):
+            prefix = f"futures{slot}_"
+            ft = etf_df.get(prefix + "type")
+            if ft is None:
+                continue
+            has = (ft.notna() & (ft != "")).to_numpy()
+            # 先物2 は保有している行が1つでもある場合のみ列を出す
+            if slot == 2 and not has.any():
+                continue
+
+            fm = etf_df.get(prefix + "contract_month", pd.Series("", index=etf_df.index))
+            fm_ok = (fm.notna() & (fm != "")).to_numpy()
+            label = np.where(
+                fm_ok,
+                (ft.astype(str) + " " + fm.astype(str)).to_numpy(dtype=object),
+                ft.to_numpy(dtype=object),
+            )
+
+            # 想定元本を計算
+            qty = _column_array(etf_df, prefix + "quantity", np.nan)
+            notional = _calc_notional(
+                _column_array(etf_df, prefix + "market_value", np.nan),
+                qty,
+                _column_array(etf_df, prefix + "multiplier", 1.0),
+            )
+
+            columns[f"先物{slot}"] = np.where(has, label, "")
+            columns[f"先物{slot}枚数"] = np.where(has, qty, np.nan)
+            columns[f"先物{slot}想定元本（円）"] = np.where(
+                has & (notional != 0), notional, np.nan
+            )
+            column_config[f"先物{slot}枚数"] = st.column_config.NumberColumn(format="%,d枚")
+            column_config[f"先物{slot}想定元本（円）"] = _YEN_COLUMN
+
+    return pd.DataFrame(columns), column_config
+
+
+def _column_array(df: pd.DataFrame, col: str, default: float) -> np.ndarray:
+    """数値列を float の配列で取り出す（列が無ければ default で埋める）"""
+    if col not in df.columns:
+        return np.full(len(df), default, dtype=np.float64)
+    return pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _calc_notional(
+    mv: np.ndarray, qty: np.ndarray, mult: np.ndarray,
+) -> np.ndarray:
+    """想定元本を計算（aggregatorと同じロジック、列ごとに一括で計算する）"""
+    mv_ok = ~np.isnan(mv) & (mv != 0)
+    scalable = ~np.isnan(qty) & (qty != 0) & ~np.isnan(mult) & (mult != 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        unit_est = np.abs(mv) / (np.abs(qty) * mult)
+    # unit_est >= 100 なら既に想定元本、それ以外は multiplier を適用
+    notional = np.where(scalable & (unit_est < 100), mv * mult, mv)
+    return np.where(mv_ok, notional, 0.0)
+
+
+def _build_csv_export(etf_df: pd.DataFrame, etf_code: str) -> bytes:
+    """
+    CSV エクスポート用のバイト列を生成
+
+    pandas の to_csv で Python 文字列を組み立てず、Arrow の CSV ライターで
+    直接バイト列に書き出す。
+    """
     export_cols = [
         "date", "nav", "nav_per_unit", "shares_outstanding",
         "cash_component", "equity_market_value", "equity_count_tse",
@@ -210,7 +241,32 @@ def _build_csv_export(etf_df: pd.DataFrame, etf_code: str) -> str:
     # 存在するカラムのみ
     export_cols = [c for c in export_cols if c in etf_df.columns]
 
-    export_df = etf_df[export_cols].copy()
-    export_df = export_df.sort_values("date", ascending=False)
-
-    return export_df.to_csv(index=False)
+    # etf_df は呼び出し側で日付の降順に並べ済み
+    export_df = etf_df[export_cols]
+
+    try:
+        table = pa.Table.from_pandas(export_df, preserve_index=False)
+        # 日付は時刻なしの YYYY-MM-DD で出力する
+        if pa.types.is_timestamp(table.schema.field("date").type):
+            date_idx = table.schema.get_field_index("date")
+            table = table.set_column(
+                date_idx, "date", pc.cast(table["date"], pa.date32(), safe=False),
+            )
+        # 金額・口数・枚数は整数にして出力する（float のままだと大きな金額が
+        # 1.23e+11 のような指数表記になる）。端数がある列は cast が失敗する
+        for col in _CSV_INTEGER_COLUMNS:
+            idx = table.schema.get_field_index(col)
+            if idx >= 0 and pa.types.is_floating(table.schema.field(idx).type):
+                table = table.set_column(idx, col, pc.cast(table[col], pa.int64()))
+        buf = pa.BufferOutputStream()
+        # ヘッダー・文字列は引用符で囲まない（区切り文字等を含む値があれば失敗する）
+        buf.write((",".join(table.column_names) + "\n").encode("utf-8"))
+        pacsv.write_csv(
+            table, buf, write_options=pacsv.WriteOptions(
+                include_header=False, quoting_style="none",
+            ),
+        )
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        # 整数にできない金額や引用符が必要な文字列を含む場合は pandas で書き出す
+        return export_df.to_csv(index=False).encode("utf-8")
+    return buf.getvalue().to_pybytes()
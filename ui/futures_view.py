@@ -3,6 +3,7 @@
 """
 from __future__ import annotations
 
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
@@ -12,16 +13,18 @@ import streamlit as st
 from config import FUTURES_MULTIPLIERS, TOPIX_ETF_CODES, NIKKEI225_ETF_CODES
 
 
-def _format_yen(value: float) -> str:
-    if pd.isna(value):
-        return "---"
-    abs_val = abs(value)
-    if abs_val >= 1e12:
-        return f"{value/1e12:.2f}兆円"
-    elif abs_val >= 1e8:
-        return f"{value/1e8:,.0f}億円"
-    else:
-        return f"{value:,.0f}円"
+def _format_yen_series(values) -> np.ndarray:
+    """金額の列を読みやすい形式（兆円 / 億円 / 円）にまとめて変換する"""
+    arr = np.asarray(values, dtype=np.float64)
+    abs_val = np.abs(arr)
+    out = np.full(arr.shape, "---", dtype=object)
+    cho = abs_val >= 1e12
+    oku = (abs_val >= 1e8) & ~cho
+    yen = abs_val < 1e8  # NaN はどれにも入らず "---" のまま
+    out[cho] = list(map("{:.2f}兆円".format, (arr[cho] / 1e12).tolist()))
+    out[oku] = list(map("{:,.0f}億円".format, (arr[oku] / 1e8).tolist()))
+    out[yen] = list(map("{:,.0f}円".format, arr[yen].tolist()))
+    return out
 
 
 # ETF別色パレット
@@ -59,6 +62,15 @@ _MAIN_UNDERLYINGS = [
     "東証REIT先物",
 ]
 
+# チャートの表示粒度 → 期間の頻度（日次は間引かない）
+_GRANULARITY_FREQ = {
+    "日次": None,
+    "週次": "W",
+    "月次": "M",
+}
+# 表示期間の日数がこれを超える場合は週次を既定にする
+_WEEKLY_DEFAULT_MIN_DAYS = 180
+
 # 原資産グループ → 対象ETFコード（設定・交換で集計しているETFに限定）
 # TOPIX/NK225 のみフィルタ、それ以外は全ETF表示
 _UNDERLYING_ETF_FILTER: dict[str, list[str]] = {
@@ -69,42 +81,77 @@ _UNDERLYING_ETF_FILTER: dict[str, list[str]] = {
 
 def _add_underlying_group(futures_df: pd.DataFrame) -> pd.DataFrame:
     """futures_type を原資産グループに変換した列を追加する"""
-    df = futures_df.copy()
-    df["underlying"] = df["futures_type"].map(_UNDERLYING_GROUP).fillna("その他")
-    return df
+    # 先物種別は数種類しかないので、カテゴリ型にして種類ごとに1回だけ変換する
+    # (assign は元の列を共有するので、全体をコピーせずに列を追加できる)
+    return futures_df.assign(
+        underlying=futures_df["futures_type"].astype("category")
+        .map(_UNDERLYING_GROUP).fillna("その他")
+    )
 
 
-def render_futures_analysis(
-    futures_df: pd.DataFrame,
-    index_df: pd.DataFrame | None = None,
-) -> None:
-    """
-    先物ポジション分析のメインレンダラー。
-    原資産の選択UI + ETF別枚数棒グラフ + 指数二軸。
+@st.cache_data(ttl=300, max_entries=32, show_spinner=False)
+def _summarize_underlyings(futures_df: pd.DataFrame) -> tuple[pd.DataFrame, list[str]]:
     """
-    if futures_df.empty:
-        st.info("先物データがありません")
-        return
+    最新日の原資産グループ別サマリーと、選択肢に並べる原資産の一覧を返す。
 
+    ウィジェット操作による再実行で全データを集計し直さないようキャッシュする。
+    """
     df = _add_underlying_group(futures_df)
 
-    # --- サマリーテーブル（原資産グループ単位） ---
-    st.subheader("先物ポジション概要（原資産別）")
     latest_date = df["date"].max()
-    latest = df[df["date"] == latest_date].copy()
+    latest = df[df["date"] == latest_date]
 
     # notional_value があればそれを使用、なければ market_value
     value_col = "notional_value" if "notional_value" in latest.columns else "market_value"
 
-    summary = latest.groupby("underlying").agg(
+    # 絶対値の列を先に作り、グループごとの lambda ではなく組み込みの sum で集計する
+    summary = latest.assign(abs_value=latest[value_col].abs()).groupby("underlying").agg(
         etf_count=("etf_code", "nunique"),
         total_quantity=("quantity", "sum"),
-        total_value=(value_col, lambda x: x.abs().sum()),
+        total_value=("abs_value", "sum"),
     ).reset_index()
 
-    summary["想定元本表示"] = summary["total_value"].apply(_format_yen)
+    summary["想定元本表示"] = _format_yen_series(summary["total_value"])
     summary = summary.sort_values("total_value", ascending=False)
 
+    available_underlyings = sorted(df["underlying"].unique())
+    # 主要先物を先に並べる
+    ordered = [u for u in _MAIN_UNDERLYINGS if u in available_underlyings]
+    ordered += [u for u in available_underlyings if u not in ordered]
+
+    return summary, ordered
+
+
+@st.cache_data(ttl=300, max_entries=32, show_spinner=False)
+def _select_underlying(futures_df: pd.DataFrame, underlying: str) -> pd.DataFrame:
+    """選択した原資産グループの行を抽出する（原資産ごとにキャッシュ）"""
+    df = _add_underlying_group(futures_df)
+    underlying_df = df[df["underlying"] == underlying]
+
+    # TOPIX/NK225 は設定・交換と同じETFに絞り込む
+    etf_filter = _UNDERLYING_ETF_FILTER.get(underlying)
+    if etf_filter is not None:
+        underlying_df = underlying_df[underlying_df["etf_code"].isin(etf_filter)]
+
+    return underlying_df
+
+
+def render_futures_analysis(
+    futures_df: pd.DataFrame,
+    index_df: pd.DataFrame | None = None,
+) -> None:
+    """
+    先物ポジション分析のメインレンダラー。
+    原資産の選択UI + ETF別枚数棒グラフ + 指数二軸。
+    """
+    if futures_df.empty:
+        st.info("先物データがありません")
+        return
+
+    summary, ordered = _summarize_underlyings(futures_df)
+
+    # --- サマリーテーブル（原資産グループ単位） ---
+    st.subheader("先物ポジション概要（原資産別）")
     st.dataframe(
         summary.rename(columns={
             "underlying": "原資産",
@@ -118,11 +165,6 @@ def render_futures_analysis(
 
     # --- 原資産選択UI ---
     st.markdown("---")
-    available_underlyings = sorted(df["underlying"].unique())
-    # 主要先物を先に並べる
-    ordered = [u for u in _MAIN_UNDERLYINGS if u in available_underlyings]
-    ordered += [u for u in available_underlyings if u not in ordered]
-
     selected_underlying = st.selectbox(
         "原資産を選択",
         options=ordered,
@@ -131,47 +173,73 @@ def render_futures_analysis(
     )
 
     # --- 選択した原資産のデータを抽出 ---
-    underlying_df = df[df["underlying"] == selected_underlying].copy()
-
-    # TOPIX/NK225 は設定・交換と同じETFに絞り込む
-    etf_filter = _UNDERLYING_ETF_FILTER.get(selected_underlying)
-    if etf_filter is not None:
-        underlying_df = underlying_df[
-            underlying_df["etf_code"].isin(etf_filter)
-        ].copy()
+    underlying_df = _select_underlying(futures_df, selected_underlying)
 
     if underlying_df.empty:
         st.info(f"{selected_underlying} のデータがありません")
         return
 
+    # 2つのチャートで ETF の色を揃えるため、配色は一度だけ決める
+    color_map = _build_color_map(underlying_df)
+
+    # 長い期間では棒の数が ETF数 × 日数 になるため、週次・月次に間引けるようにする
+    granularity = st.radio(
+        "粒度",
+        list(_GRANULARITY_FREQ),
+        index=1 if underlying_df["date"].nunique() > _WEEKLY_DEFAULT_MIN_DAYS else 0,
+        horizontal=True,
+        key="futures_granularity",
+    )
+    freq = _GRANULARITY_FREQ[granularity]
+
     # --- ETF別の枚数棒グラフ（積み上げ） + 指数二軸 ---
-    _render_etf_quantity_chart(underlying_df, selected_underlying, index_df)
+    _render_etf_quantity_chart(
+        underlying_df, selected_underlying, color_map, freq, index_df,
+    )
 
     # --- ETF別の時価棒グラフ（積み上げ） ---
-    _render_etf_market_value_chart(underlying_df, selected_underlying)
+    _render_etf_market_value_chart(underlying_df, selected_underlying, color_map, freq)
 
     # --- 限月別ポジション ---
     _render_contract_month_table(underlying_df, selected_underlying)
 
 
+def _build_color_map(underlying_df: pd.DataFrame) -> dict[str, str]:
+    """ETFコード（昇順）→ チャートの色"""
+    etf_codes = sorted(underlying_df["etf_code"].dropna().unique())
+    return {
+        code: _ETF_COLORS[i % len(_ETF_COLORS)]
+        for i, code in enumerate(etf_codes)
+    }
+
+
+def _period_end_rows(daily: pd.DataFrame, freq: str) -> pd.DataFrame:
+    """
+    期間（週・月）ごとに、その期間の最終日の行だけを残す。
+
+    枚数・想定元本は残高なので期間内で合計せず、期末時点の値を表示する。
+    """
+    period = daily["date"].dt.to_period(freq)
+    last_date = daily["date"].groupby(period).transform("max")
+    return daily[daily["date"] == last_date]
+
+
 def _render_etf_quantity_chart(
     underlying_df: pd.DataFrame,
     underlying_name: str,
+    color_map: dict[str, str],
+    freq: str | None = None,
     index_df: pd.DataFrame | None = None,
 ) -> None:
     """ETF別の枚数推移（積み上げ棒グラフ） + 指数二軸"""
     st.subheader(f"{underlying_name} — ETF別建玉枚数")
 
     # ETFごとの日次合計枚数
-    daily = underlying_df.groupby(["date", "etf_code"]).agg(
+    daily = underlying_df.groupby(["date", "etf_code"], observed=True).agg(
         total_quantity=("quantity", "sum"),
     ).reset_index()
-
-    etf_codes = sorted(daily["etf_code"].unique())
-    color_map = {
-        code: _ETF_COLORS[i % len(_ETF_COLORS)]
-        for i, code in enumerate(etf_codes)
-    }
+    if freq is not None:
+        daily = _period_end_rows(daily, freq)
 
     # 指数データの準備
     idx_col = _UNDERLYING_INDEX_MAP.get(underlying_name)
@@ -186,18 +254,18 @@ def _render_etf_quantity_chart(
         specs=[[{"secondary_y": True}]],
     )
 
-    for code in etf_codes:
-        etf_data = daily[daily["etf_code"] == code]
-        fig.add_trace(
-            go.Bar(
-                x=etf_data["date"],
-                y=etf_data["total_quantity"],
-                name=code,
-                marker_color=color_map[code],
-                hovertemplate=f"{code}<br>%{{x}}<br>%{{y:,.0f}}枚<extra></extra>",
-            ),
-            secondary_y=False,
+    # ETFごとの絞り込みを繰り返さず、groupby で分割したトレースをまとめて追加する
+    bars = [
+        go.Bar(
+            x=etf_data["date"],
+            y=etf_data["total_quantity"],
+            name=code,
+            marker_color=color_map[code],
+            hovertemplate=f"{code}<br>%{{x}}<br>%{{y:,.0f}}枚<extra></extra>",
         )
+        for code, etf_data in daily.groupby("etf_code", observed=True)
+    ]
+    fig.add_traces(bars, rows=1, cols=1, secondary_ys=[False] * len(bars))
 
     # 指数の二軸折れ線
     if has_index:
@@ -231,6 +299,8 @@ def _render_etf_quantity_chart(
 def _render_etf_market_value_chart(
     underlying_df: pd.DataFrame,
     underlying_name: str,
+    color_map: dict[str, str],
+    freq: str | None = None,
 ) -> None:
     """ETF別の想定元本推移（積み上げ棒グラフ）"""
     # notional_value があればそれを使用、なければ market_value
@@ -238,30 +308,25 @@ def _render_etf_market_value_chart(
 
     st.subheader(f"{underlying_name} — ETF別想定元本")
 
-    daily = underlying_df.groupby(["date", "etf_code"]).agg(
+    daily = underlying_df.groupby(["date", "etf_code"], observed=True).agg(
         total_value=(value_col, "sum"),
     ).reset_index()
-
-    etf_codes = sorted(daily["etf_code"].unique())
-    color_map = {
-        code: _ETF_COLORS[i % len(_ETF_COLORS)]
-        for i, code in enumerate(etf_codes)
-    }
+    if freq is not None:
+        daily = _period_end_rows(daily, freq)
 
     fig = go.Figure()
 
-    for code in etf_codes:
-        etf_data = daily[daily["etf_code"] == code]
-        fig.add_trace(
-            go.Bar(
-                x=etf_data["date"],
-                y=etf_data["total_value"],
-                name=code,
-                marker_color=color_map[code],
-                hovertemplate=f"{code}<br>%{{x}}<br>%{{customdata}}<extra></extra>",
-                customdata=[_format_yen(v) for v in etf_data["total_value"]],
-            )
+    fig.add_traces([
+        go.Bar(
+            x=etf_data["date"],
+            y=etf_data["total_value"],
+            name=code,
+            marker_color=color_map[code],
+            hovertemplate=f"{code}<br>%{{x}}<br>%{{customdata}}<extra></extra>",
+            customdata=_format_yen_series(etf_data["total_value"]),
         )
+        for code, etf_data in daily.groupby("etf_code", observed=True)
+    ])
 
     fig.update_layout(
         title=f"{underlying_name} ETF別想定元本推移",
@@ -284,17 +349,18 @@ def _render_contract_month_table(
     st.subheader(f"{underlying_name} — 限月別ポジション")
 
     latest_date = underlying_df["date"].max()
-    latest = underlying_df[underlying_df["date"] == latest_date].copy()
+    latest = underlying_df[underlying_df["date"] == latest_date]
 
     if latest["contract_month"].notna().any():
         value_col = "notional_value" if "notional_value" in latest.columns else "market_value"
+        latest = latest.assign(abs_value=latest[value_col].abs())
         month_summary = latest.groupby(["futures_type", "contract_month"]).agg(
             total_quantity=("quantity", "sum"),
             etf_count=("etf_code", "nunique"),
-            total_value=(value_col, lambda x: x.abs().sum()),
+            total_value=("abs_value", "sum"),
         ).reset_index()
 
-        month_summary["想定元本表示"] = month_summary["total_value"].apply(_format_yen)
+        month_summary["想定元本表示"] = _format_yen_series(month_summary["total_value"])
 
         st.dataframe(
             month_summary.rename(columns={
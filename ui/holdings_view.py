@@ -6,6 +6,7 @@
 """
 from __future__ import annotations
 
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
@@ -18,6 +19,9 @@ _ETF_COLORS = (
     + px.colors.qualitative.Set3
 )
 
+# 金額列の表示形式（整数に切り捨ててカンマ区切り + 円）
+_YEN_COLUMN = st.column_config.NumberColumn(format="%,d円")
+
 
 def render_holdings_view(
     holdings_df: pd.DataFrame,
@@ -35,7 +39,7 @@ def render_holdings_view(
 
     # --- 銘柄リスト作成（stock_code でグループ化し、最頻出の名前を使用） ---
     stock_names = _build_stock_name_map(holdings_df)
-    stock_codes = sorted(stock_names.keys())
+    stock_codes, search_names = _build_search_index(stock_names)
 
     if not stock_codes:
         st.info("個別銘柄データがありません")
@@ -51,10 +55,11 @@ def render_holdings_view(
     filtered_codes = stock_codes
     if search_text:
         search_upper = search_text.upper()
-        filtered_codes = [
-            c for c in stock_codes
-            if search_upper in c or search_upper in stock_names[c].upper()
-        ]
+        hit = (
+            (np.char.find(np.asarray(stock_codes), search_upper) >= 0)
+            | (np.char.find(search_names, search_upper) >= 0)
+        )
+        filtered_codes = [c for c, h in zip(stock_codes, hit) if h]
 
     if not filtered_codes:
         st.warning(f"「{search_text}」に一致する銘柄が見つかりません")
@@ -77,9 +82,7 @@ def render_holdings_view(
     st.subheader(f"{selected_stock} {selected_name}")
 
     # --- 選択銘柄のデータ抽出 ---
-    stock_df = holdings_df[
-        holdings_df["stock_code"] == selected_stock
-    ].copy()
+    stock_df = _select_stock(holdings_df, selected_stock)
 
     if stock_df.empty:
         st.info("この銘柄のデータがありません")
@@ -91,19 +94,22 @@ def render_holdings_view(
 
     st.caption(f"最新データ: {latest_date.strftime('%Y-%m-%d')}")
 
-    # サマリーテーブル
-    summary_rows = []
-    for _, row in latest.sort_values("market_value", ascending=False).iterrows():
-        summary_rows.append({
-            "ETFコード": row["etf_code"],
-            "保有株数": f"{int(row['shares']):,}株",
-            "株価（円）": f"{row['price']:,.1f}円",
-            "時価（円）": f"{int(row['market_value']):,}円",
+    # サマリーテーブル（数値のまま渡し、表示形式は column_config で指定する）
+    if not latest.empty:
+        latest = latest.sort_values("market_value", ascending=False)
+        summary = pd.DataFrame({
+            "ETFコード": latest["etf_code"].astype(str).tolist(),
+            "保有株数": latest["shares"].to_numpy(),
+            "株価（円）": latest["price"].to_numpy(),
+            "時価（円）": latest["market_value"].to_numpy(),
         })
-
-    if summary_rows:
         st.dataframe(
-            pd.DataFrame(summary_rows),
+            summary,
+            column_config={
+                "保有株数": st.column_config.NumberColumn(format="%,d株"),
+                "株価（円）": st.column_config.NumberColumn(format="%,.1f円"),
+                "時価（円）": _YEN_COLUMN,
+            },
             use_container_width=True,
             hide_index=True,
         )
@@ -117,20 +123,44 @@ def render_holdings_view(
     _render_holdings_table(stock_df)
 
 
+@st.cache_data(ttl=300, max_entries=32, show_spinner=False)
 def _build_stock_name_map(holdings_df: pd.DataFrame) -> dict[str, str]:
-    """stock_code → 最頻出の stock_name のマップを作成"""
+    """
+    stock_code → 最頻出の stock_name のマップを作成
+
+    検索・選択のたびの再実行で作り直さないようキャッシュする。
+    """
     # 最新日のデータを使う
     latest_date = holdings_df["date"].max()
-    latest = holdings_df[holdings_df["date"] == latest_date]
+    latest = holdings_df.loc[
+        holdings_df["date"] == latest_date, ["stock_code", "stock_name"]
+    ].reset_index(drop=True)
+    names = latest["stock_name"].fillna("")
+
+    # 最も長い名前を採用（より正式な名前の可能性が高い）
+    # 銘柄ごとに名前の長さが最大の行を1回の groupby で求める
+    longest = names.str.len().groupby(latest["stock_code"], sort=False).idxmax()
+    return dict(zip(longest.index, names.to_numpy()[longest.to_numpy()]))
+
+
+@st.cache_data(ttl=300, max_entries=32, show_spinner=False)
+def _build_search_index(stock_names: dict[str, str]) -> tuple[list[str], np.ndarray]:
+    """
+    ソート済みの銘柄コード一覧と、同じ順に並べた大文字の銘柄名配列を返す。
+
+    検索欄の入力ごとの再実行で作り直さないようキャッシュする。
+    """
+    stock_codes = sorted(stock_names.keys())
+    search_names = np.char.upper(
+        np.array([stock_names[c] for c in stock_codes], dtype=str)
+    )
+    return stock_codes, search_names
 
-    name_map = {}
-    for code in latest["stock_code"].unique():
-        names = latest[latest["stock_code"] == code]["stock_name"]
-        # 最も長い名前を採用（より正式な名前の可能性が高い）
-        longest = max(names.tolist(), key=len) if not names.empty else ""
-        name_map[code] = longest
 
-    return name_map
+@st.cache_data(ttl=300, max_entries=32, show_spinner=False)
+def _select_stock(holdings_df: pd.DataFrame, stock_code: str) -> pd.DataFrame:
+    """選択銘柄の保有行を抽出する（銘柄ごとにキャッシュ）"""
+    return holdings_df[holdings_df["stock_code"] == stock_code]
 
 
 def _render_holdings_chart(
@@ -204,34 +234,26 @@ def _render_holdings_table(
     """ETF別 × 日付の保有残高テーブル"""
     st.subheader("ETF別 保有残高テーブル")
 
-    # ピボット: 行=ETF, 列=日付, 値=market_value
-    pivot = stock_df.groupby(
+    # ピボット: 行=ETF, 列=日付（降順）, 値=market_value
+    pivot_wide = stock_df.groupby(
         ["etf_code", "date"]
-    )["market_value"].sum().reset_index()
+    )["market_value"].sum().unstack("date")
+    pivot_wide = pivot_wide.iloc[:, ::-1]
 
-    pivot_wide = pivot.pivot(
-        index="etf_code", columns="date", values="market_value"
-    )
-
-    # 日付を降順に並べる
-    pivot_wide = pivot_wide[sorted(pivot_wide.columns, reverse=True)]
+    # 0 は欠損と同じく空欄にする（表示形式は column_config で指定する）
+    values = pivot_wide.to_numpy(dtype=np.float64, na_value=np.nan)
+    values = np.where(values == 0, np.nan, values)
 
     # 列名を日付文字列に
-    pivot_wide.columns = [
-        d.strftime("%m/%d") for d in pivot_wide.columns
-    ]
-
-    # 値をフォーマット
-    for col in pivot_wide.columns:
-        pivot_wide[col] = pivot_wide[col].apply(
-            lambda v: f"{int(v):,}円" if pd.notna(v) and v else ""
-        )
+    date_labels = pivot_wide.columns.strftime("%m/%d").rename(None)
+    pivot_wide = pd.DataFrame(values, index=pivot_wide.index, columns=date_labels)
 
     pivot_wide.index.name = "ETFコード"
     pivot_wide = pivot_wide.reset_index()
 
     st.dataframe(
         pivot_wide,
+        column_config=dict.fromkeys(date_labels, _YEN_COLUMN),
         use_container_width=True,
         hide_index=True,
         height=min(len(pivot_wide) * 35 + 40, 600),
@@ -3,6 +3,7 @@
 """
 from __future__ import annotations
 
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
@@ -22,10 +23,34 @@ def _format_yen(value: float) -> str:
         return f"{value:,.0f}円"
 
 
+def _format_yen_series(values) -> np.ndarray:
+    """_format_yen の列版: 金額の列をまとめて文字列に変換する"""
+    arr = np.asarray(values, dtype=np.float64)
+    abs_val = np.abs(arr)
+    out = np.full(arr.shape, "---", dtype=object)
+    cho = abs_val >= 1e12
+    oku = (abs_val >= 1e8) & ~cho
+    yen = abs_val < 1e8  # NaN はどれにも入らず "---" のまま
+    out[cho] = list(map("{:.2f}兆円".format, (arr[cho] / 1e12).tolist()))
+    out[oku] = list(map("{:,.0f}億円".format, (arr[oku] / 1e8).tolist()))
+    out[yen] = list(map("{:,.0f}円".format, arr[yen].tolist()))
+    return out
+
+
 # 色パレット
 _ETF_COLORS = px.colors.qualitative.Set3 + px.colors.qualitative.Pastel
 
 
+@st.cache_data(ttl=300, max_entries=32, show_spinner=False)
+def _daily_nav_by_etf(etf_breakdown: pd.DataFrame) -> pd.Series:
+    """
+    (ETFコード, 日付) ごとのNAV合計。
+
+    ETFごとの絞り込みを繰り返さず1回の groupby で求め、再実行時はキャッシュを使う。
+    """
+    return etf_breakdown.groupby(["etf_code", "date"])["nav"].sum()
+
+
 def render_nav_timeseries(
     nav_df: pd.DataFrame,
     title: str = "資産残高（NAV合計）",
@@ -55,21 +80,23 @@ def render_nav_timeseries(
             for i, code in enumerate(etf_codes)
         }
 
-        for code in etf_codes:
-            etf_data = etf_breakdown[etf_breakdown["etf_code"] == code]
-            daily_etf = etf_data.groupby("date")["nav"].sum().reset_index()
+        # ETFごとにトレースを作り、figure への追加は1回にまとめる
+        bars = []
+        for code, daily_etf in _daily_nav_by_etf(etf_breakdown).groupby(level="etf_code"):
+            daily_etf = daily_etf.droplevel("etf_code").reset_index()
 
-            fig.add_trace(
+            bars.append(
                 go.Bar(
                     x=daily_etf["date"],
                     y=daily_etf["nav"],
                     name=code,
                     marker_color=color_map[code],
                     hovertemplate=f"{code}<br>%{{x}}<br>%{{customdata}}<extra></extra>",
-                    customdata=[_format_yen(v) for v in daily_etf["nav"]],
-                ),
-                secondary_y=False,
+                    customdata=_format_yen_series(daily_etf["nav"]),
+                )
             )
+
+        fig.add_traces(bars, rows=1, cols=1, secondary_ys=[False] * len(bars))
     else:
         # フォールバック: 合計棒グラフ
         fig.add_trace(
@@ -79,7 +106,7 @@ def render_nav_timeseries(
                 name="NAV合計",
                 marker_color="rgba(55, 128, 235, 0.7)",
                 hovertemplate="%{x}<br>合計: %{customdata}<extra></extra>",
-                customdata=[_format_yen(v) for v in nav_df["nav_total"]],
+                customdata=_format_yen_series(nav_df["nav_total"]),
             ),
             secondary_y=False,
         )
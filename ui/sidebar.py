@@ -66,11 +66,13 @@ def render_sidebar(master_df: pd.DataFrame) -> dict:
 
     # 個別ETF選択（オプション）
     selected_etf = None
+    # マスタ登録済みコードの集合（カテゴリ別の絞り込み・件数で共通に使う）
+    master_codes = set(master_df["code"]) if not master_df.empty else set()
     if not master_df.empty:
         if category in CATEGORY_CODE_MAP:
             etf_list = [
                 c for c in CATEGORY_CODE_MAP[category]
-                if c in master_df["code"].values
+                if c in master_codes
             ]
         else:
             etf_list = master_df["code"].tolist()
@@ -97,7 +99,7 @@ def render_sidebar(master_df: pd.DataFrame) -> dict:
             if key.endswith("_all") or key == "all":
                 continue
             label = CATEGORY_LABELS.get(key, key)
-            count = len([c for c in codes if c in master_df["code"].values])
+            count = sum(1 for c in codes if c in master_codes)
             st.sidebar.markdown(f"- {label}: **{count}**")
         st.sidebar.markdown(f"- 先物保有: **{int(futures_count)}**")
 